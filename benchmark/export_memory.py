@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import resource
+import sys
+import time
+
+from pydantic import BaseModel
+
+from tests.helpers import migrate_scratch_db, scratch_db_executor
+from wgwatch.types import ExportFormat
+
+logger = logging.getLogger(__name__)
+
+_CITIES = ["Berlin", "Hamburg", "Köln", "München"]
+_OFFER_TYPES = ["Room", "Apartment", "Suite"]
+
+
+class ExportResult(BaseModel):
+    path: str
+    export_format: ExportFormat
+    compress: bool
+    n_bytes: int
+    seconds: float
+    peak_rss_growth_mb: float
+
+
+def _migrate_and_seed(n_rows: int) -> None:
+    """Synthetic rows straight in the table the export reads."""
+    from django.db import connection, transaction
+
+    from data_prepper.main import LATEST_LISTING_TABLE
+
+    migrate_scratch_db()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH RECURSIVE seq(i) AS (
+                SELECT 1
+                UNION ALL
+                SELECT i + 1 FROM seq WHERE i < %s
+            )
+            INSERT INTO {LATEST_LISTING_TABLE} (
+                id, name, url, offer_type, price, square_meters,
+                address_locality, job_insert_time, scrape_date, rn,
+                price_rank_normalized
+            )
+            SELECT
+                i,
+                'Benchmark listing ' || i,
+                'https://www.wg-gesucht.de/' || i || '.html',
+                json_extract(%s, '$[' || (i %% 3) || ']'),
+                300 + i %% 1700,
+                10 + i %% 110,
+                json_extract(%s, '$[' || (i %% 4) || ']'),
+                '2025-01-01 12:00:00',
+                date('2025-01-01', '+' || (i %% 365) || ' days'),
+                1,
+                (i %% 1000) / 999.0
+            FROM seq;
+            """,
+            [
+                n_rows,
+                json.dumps(_OFFER_TYPES),
+                json.dumps(_CITIES, ensure_ascii=False),
+            ],
+        )
+
+
+def _peak_rss_mb() -> float:
+    # Kilobytes on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 1024**2 if sys.platform == "darwin" else peak_rss / 1024
+
+
+def _export(
+    path: str, export_format: ExportFormat, compress: bool
+) -> ExportResult:
+    """Export all rows into the void, as the command or the endpoint does."""
+    from wgwatch.export import aiter_export, iter_export
+    from wgwatch.types import ExportFilter
+
+    # Warm up imports and the connection with a single day first
+    day = datetime.date(2025, 1, 1)
+    for _ in iter_export(
+        ExportFilter(date_from=day, date_to=day), export_format, compress
+    ):
+        pass
+    rss_before_mb = _peak_rss_mb()
+
+    start = time.perf_counter()
+    n_bytes: int
+    if path == "command":
+        n_bytes = sum(
+            len(chunk)
+            for chunk in iter_export(ExportFilter(), export_format, compress)
+        )
+    else:
+
+        async def _consume() -> int:
+            n_bytes = 0
+            async for chunk in aiter_export(
+                ExportFilter(), export_format, compress
+            ):
+                n_bytes += len(chunk)
+            return n_bytes
+
+        n_bytes = asyncio.run(_consume())
+
+    return ExportResult(
+        path=path,
+        export_format=export_format,
+        compress=compress,
+        n_bytes=n_bytes,
+        seconds=time.perf_counter() - start,
+        peak_rss_growth_mb=_peak_rss_mb() - rss_before_mb,
+    )
+
+
+def run_exports(
+    n_rows: int, profile: str, export_formats: list[ExportFormat]
+) -> list[ExportResult]:
+    """Seed a scratch database and export it in every way."""
+    # One task per process, so every export starts with a fresh peak RSS
+    with scratch_db_executor(
+        max_workers=1, profile=profile, max_tasks_per_child=1
+    ) as executor:
+        executor.submit(_migrate_and_seed, n_rows).result()
+
+        return [
+            executor.submit(_export, path, export_format, compress).result()
+            for path in ["command", "endpoint"]
+            for export_format in export_formats
+            for compress in [False, True]
+        ]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Export synthetic listings from a scratch database and fail if"
+            " the peak RSS grows by more than the limit"
+        )
+    )
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=64)
+    # The tuned profile adds up to cache_size plus mmap_size of SQLite page
+    # cache per connection, which is bounded too but hides the export's own
+    parser.add_argument("--profile", default="default")
+    args = parser.parse_args()
+
+    logger.info(f"Seeding {args.rows} rows...")
+    results = run_exports(args.rows, args.profile, ["csv", "ndjson"])
+
+    failed = False
+    for result in results:
+        ok = result.peak_rss_growth_mb <= args.max_rss_growth_mb
+        failed |= not ok
+        logger.info(
+            f"{'✅' if ok else '❌'} {result.path:<8}"
+            f" {result.export_format:<6}"
+            f" {'gzip' if result.compress else 'raw':<4}"
+            f" {result.n_bytes / 1024**2:9.1f} MB"
+            f" in {result.seconds:6.1f} s,"
+            f" peak RSS +{result.peak_rss_growth_mb:.1f} MB"
+        )
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
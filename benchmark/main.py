@@ -0,0 +1,259 @@
+import argparse
+import datetime
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import django
+from bs4 import BeautifulSoup
+from pydantic import BaseModel
+
+from scraper.main import (
+    _build_listing_card_index,
+    _extract_and_add_square_meters,
+    _parse_page_fast,
+    _parse_page_with_soup,
+    build_django_listings,
+    extract_listings,
+    get_last_page_number,
+    parse_listings_from_listings_str,
+    parse_page,
+)
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CAPTURED_PAGES = [
+    BASE_DIR / "data" / "wg_gesucht.html",
+    BASE_DIR / "listings.html",
+]
+RESULTS_DIR = BASE_DIR / "benchmark" / "results"
+
+
+class StageResult(BaseModel):
+    page: str
+    stage: str
+    repeats: int
+    wall_time_median_s: float | None = None
+    wall_time_min_s: float | None = None
+    allocated_peak_bytes: int | None = None
+    allocated_net_bytes: int | None = None
+    n_listings: int
+    listings_per_s: float | None = None
+    error: str | None = None
+
+
+class BenchmarkRun(BaseModel):
+    commit: str | None
+    created_at: datetime.datetime
+    python_version: str
+    results: list[StageResult]
+
+
+def _current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run_stage(
+    page: str,
+    stage: str,
+    func: Callable[[], Any],
+    n_listings: int,
+    repeats: int,
+) -> StageResult:
+    timings = []
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        # Separate run as tracing allocations skews the timings
+        tracemalloc.start()
+        allocated_before, _ = tracemalloc.get_traced_memory()
+        func()
+        allocated_after, allocated_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    except (RuntimeError, ValueError) as e:
+        tracemalloc.stop()
+        return StageResult(
+            page=page,
+            stage=stage,
+            repeats=repeats,
+            n_listings=n_listings,
+            error=str(e),
+        )
+
+    wall_time_median_s = statistics.median(timings)
+    return StageResult(
+        page=page,
+        stage=stage,
+        repeats=repeats,
+        wall_time_median_s=wall_time_median_s,
+        wall_time_min_s=min(timings),
+        allocated_peak_bytes=allocated_peak - allocated_before,
+        allocated_net_bytes=allocated_after - allocated_before,
+        n_listings=n_listings,
+        listings_per_s=(
+            n_listings / wall_time_median_s
+            if n_listings and wall_time_median_s
+            else None
+        ),
+    )
+
+
+def benchmark_page(page_path: Path, repeats: int) -> list[StageResult]:
+    html = page_path.read_text()
+    # Relative, so results of different checkouts can be compared
+    page = str(page_path.relative_to(BASE_DIR))
+
+    # Inputs for the later stages come from the soup path, so that pages
+    # the fast path rejects are still measured as far as they get
+    html_soup = BeautifulSoup(html, "html.parser")
+    try:
+        listings_str = extract_listings(html_soup)
+    except RuntimeError:
+        listings_str = None
+    listings_parsed = (
+        parse_listings_from_listings_str(listings_str) if listings_str else []
+    )
+    card_index = _build_listing_card_index(html_soup)
+    listings_parsed_with_additions = _extract_and_add_square_meters(
+        card_index=card_index, scraped_real_estate_listings=listings_parsed
+    )
+    n_listings = len(listings_parsed)
+
+    stages: dict[str, Callable[[], Any]] = {
+        "parse_page": lambda: parse_page(html),
+        "parse_page_fast": lambda: _parse_page_fast(html),
+        "parse_page_with_soup": lambda: _parse_page_with_soup(html),
+        "beautifulsoup": lambda: BeautifulSoup(html, "html.parser"),
+        "extract_listings": lambda: extract_listings(html_soup),
+        "get_last_page_number": lambda: get_last_page_number(html_soup),
+        "build_listing_card_index": lambda: _build_listing_card_index(
+            html_soup
+        ),
+        "extract_and_add_square_meters": lambda: _extract_and_add_square_meters(
+            card_index=card_index,
+            scraped_real_estate_listings=listings_parsed,
+        ),
+        "build_django_listings": lambda: build_django_listings(
+            scraped_real_estate_listings=listings_parsed_with_additions,
+            current_page=0,
+        ),
+    }
+    if listings_str:
+        stages["parse_listings_from_listings_str"] = lambda: (
+            parse_listings_from_listings_str(listings_str)
+        )
+
+    return [
+        _run_stage(
+            page=page,
+            stage=stage,
+            func=func,
+            n_listings=n_listings,
+            repeats=repeats,
+        )
+        for stage, func in stages.items()
+    ]
+
+
+def _log_results(
+    results: list[StageResult], baseline: BenchmarkRun | None
+) -> None:
+    baseline_times = {
+        (result.page, result.stage): result.wall_time_median_s
+        for result in (baseline.results if baseline else [])
+    }
+
+    for result in results:
+        if result.error or result.wall_time_median_s is None:
+            logger.info(f"{result.page:<22} {result.stage:<32} {result.error}")
+            continue
+
+        line = (
+            f"{result.page:<22} {result.stage:<32}"
+            f" {result.wall_time_median_s * 1000:9.2f} ms"
+            f" {(result.allocated_peak_bytes or 0) / 1e6:8.2f} MB peak"
+        )
+        if result.listings_per_s:
+            line += f" {result.listings_per_s:10.0f} listings/s"
+
+        baseline_time = baseline_times.get((result.page, result.stage))
+        if baseline_time:
+            change = result.wall_time_median_s / baseline_time - 1
+            line += f" ({change:+.0%} vs baseline)"
+        logger.info(line)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Fallback notices from the scraper would drown the timings
+    logging.getLogger("scraper.main").setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(
+        description="Offline benchmark of the scraper's parsing stages"
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Defaults to benchmark/results/<commit>.json",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Results of an earlier run to compare against",
+    )
+    args = parser.parse_args()
+
+    # Model construction needs the app registry, but no database
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wgwatch.settings")
+    django.setup()
+
+    results = []
+    for page_path in CAPTURED_PAGES:
+        results.extend(benchmark_page(page_path, repeats=args.repeats))
+
+    commit = _current_commit()
+    benchmark_run = BenchmarkRun(
+        commit=commit,
+        created_at=datetime.datetime.now(datetime.UTC),
+        python_version=platform.python_version(),
+        results=results,
+    )
+
+    baseline = (
+        BenchmarkRun.model_validate_json(args.baseline.read_text())
+        if args.baseline
+        else None
+    )
+    _log_results(results, baseline)
+
+    output_path = args.output or RESULTS_DIR / f"{commit or 'unknown'}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(benchmark_run.model_dump_json(indent=2))
+    logger.info(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
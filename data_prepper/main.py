@@ -1,49 +1,433 @@
+import argparse
+import json
 import os
 
 import django
-from django.db import connection
+from django.db import connection, transaction
+
+LISTING_TABLE = "wgwatch_realestatelisting"
+SIGHTING_TABLE = "wgwatch_listingsighting"
+LATEST_LISTING_TABLE = "latest_realestatelisting_per_day"
+ROLLUP_TABLE = "daily_city_offer_rollup"
+PERCENTILE_TABLE = "daily_city_offer_percentiles"
+CATALOG_TABLE = "listing_catalog"
+STATE_TABLE = "data_prepper_state"
+# Bumped on every refresh that changed data, the app caches on it
+DATA_VERSION_TABLE = "data_version"
+
+# Columns the latest table adds to the listings table
+LATEST_LISTING_EXTRA_COLUMNS = ["rn", "price_rank_normalized"]
+
+# The queries below all take the scrape dates to (re)compute as a JSON array
+
+
+def latest_listing_query(listing_columns: list[str]) -> str:
+    """The latest snapshot per url and day, from snapshots and sightings.
+
+    A sighting counts its snapshot again on the sighting's scrape date, as
+    if it had been stored then. Of snapshots with the same time, e.g. those
+    stored again by a replay, the newest insert wins. The price rank is 0
+    for the cheapest and 1 for the most expensive listing of the day, city
+    and offer type. Listings without price get none.
+    """
+    sighted_columns = {
+        "listed_on_page": "sighting.listed_on_page",
+        "job_insert_time": "sighting.seen_at",
+        "scrape_date": "sighting.scrape_date",
+    }
+    snapshot_select = ", ".join(listing_columns)
+    sighting_select = ", ".join(
+        f"{sighted_columns.get(column, f'listing.{column}')} AS {column}"
+        for column in listing_columns
+    )
+    return f"""
+    WITH scrape_date AS (
+        SELECT value FROM json_each(%s)
+    ),
+    listing AS (
+        SELECT {snapshot_select}
+        FROM {LISTING_TABLE}
+        WHERE scrape_date IN (SELECT value FROM scrape_date)
+        UNION ALL
+        SELECT {sighting_select}
+        FROM {SIGHTING_TABLE} sighting
+        JOIN {LISTING_TABLE} listing
+            ON listing.id = sighting.snapshot_id
+        WHERE sighting.scrape_date IN (SELECT value FROM scrape_date)
+    )
+    SELECT *,
+        CASE WHEN price IS NOT NULL THEN
+            PERCENT_RANK() OVER (
+                PARTITION BY
+                    scrape_date, address_locality, offer_type, price IS NULL
+                ORDER BY price
+            )
+        END AS price_rank_normalized
+    FROM (
+        SELECT *,
+            ROW_NUMBER() OVER (
+                PARTITION BY scrape_date, url
+                ORDER BY job_insert_time DESC, id DESC
+            ) AS rn
+        FROM listing
+    ) t
+    WHERE t.rn = 1
+"""
+
+
+# Sums, counts and sums of squares, so averages (and variances) can be
+# combined across rows. TOTAL always returns a float, unlike SUM. The price
+# per m² is divided as REAL, like in the percentiles, so it isn't truncated.
+QUERY_DAILY_CITY_OFFER_ROLLUP = f"""
+    SELECT
+        scrape_date AS date,
+        address_locality,
+        offer_type,
+        COUNT(*) AS n_listings,
+        COUNT(price) AS n_price,
+        TOTAL(price) AS sum_price,
+        TOTAL(price * price) AS sum_price_sq,
+        COUNT(square_meters) AS n_square_meters,
+        TOTAL(square_meters) AS sum_square_meters,
+        TOTAL(square_meters * square_meters) AS sum_square_meters_sq,
+        COUNT(
+            CAST(price AS REAL) / NULLIF(square_meters, 0)
+        ) AS n_price_per_square_meter,
+        TOTAL(
+            CAST(price AS REAL) / NULLIF(square_meters, 0)
+        ) AS sum_price_per_square_meter,
+        TOTAL(
+            (CAST(price AS REAL) / NULLIF(square_meters, 0))
+            * (CAST(price AS REAL) / NULLIF(square_meters, 0))
+        ) AS sum_price_per_square_meter_sq
+    FROM {LATEST_LISTING_TABLE}
+    WHERE scrape_date IN (SELECT value FROM json_each(%s))
+    AND address_locality IS NOT NULL
+    GROUP BY scrape_date, address_locality, offer_type
+"""
+
+PERCENTILES = [10, 25, 50, 75, 90]
+_PERCENTILE_VALUES = ["price", "price_per_square_meter"]
+PERCENTILE_COLUMNS = [
+    f"{value}_p{percentile}"
+    for value in _PERCENTILE_VALUES
+    for percentile in PERCENTILES
+]
+
+
+def _percentile_column(value: str, percentile: int) -> str:
+    # Nearest rank: the smallest value with at least the percentile of the
+    # values less or equal. SQLite has no percentile function built in.
+    return f"""
+        MIN(
+            CASE WHEN {value} IS NOT NULL
+            AND {value}_cume_dist >= {percentile / 100}
+            THEN {value} END
+        ) AS {value}_p{percentile}"""
+
+
+_PERCENTILE_SELECT = ",".join(
+    _percentile_column(value, percentile)
+    for value in _PERCENTILE_VALUES
+    for percentile in PERCENTILES
+)
+
+QUERY_DAILY_CITY_OFFER_PERCENTILES = f"""
+    WITH listing AS (
+        SELECT
+            scrape_date,
+            address_locality,
+            offer_type,
+            price,
+            -- Prices without cents are stored as integers
+            CAST(price AS REAL) / NULLIF(square_meters, 0)
+                AS price_per_square_meter
+        FROM {LATEST_LISTING_TABLE}
+        WHERE scrape_date IN (SELECT value FROM json_each(%s))
+        AND address_locality IS NOT NULL
+    ),
+    ranked AS (
+        SELECT *,
+            CUME_DIST() OVER (
+                PARTITION BY
+                    scrape_date, address_locality, offer_type, price IS NULL
+                ORDER BY price
+            ) AS price_cume_dist,
+            CUME_DIST() OVER (
+                PARTITION BY
+                    scrape_date,
+                    address_locality,
+                    offer_type,
+                    price_per_square_meter IS NULL
+                ORDER BY price_per_square_meter
+            ) AS price_per_square_meter_cume_dist
+        FROM listing
+    )
+    SELECT
+        address_locality,
+        offer_type,
+        scrape_date AS date,
+        COUNT(*) AS n_listings,{_PERCENTILE_SELECT}
+    FROM ranked
+    GROUP BY scrape_date, address_locality, offer_type
+"""
+
+QUERY_LISTING_CATALOG = f"""
+    SELECT
+        date,
+        address_locality,
+        offer_type,
+        n_listings
+    FROM {ROLLUP_TABLE}
+    WHERE date IN (SELECT value FROM json_each(%s))
+"""
+
+
+def _table_columns(cursor, table: str) -> list[str]:
+    cursor.execute(f"PRAGMA table_info({table});")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _create_tables(cursor) -> None:
+    print(f"Creating table {LATEST_LISTING_TABLE}...")
+    cursor.execute(f"DROP TABLE IF EXISTS {LATEST_LISTING_TABLE};")
+    cursor.execute(f"""
+        CREATE TABLE {LATEST_LISTING_TABLE} AS
+        SELECT *, 0 AS rn, 0.0 AS price_rank_normalized
+        FROM {LISTING_TABLE}
+        WHERE false;
+    """)
+    # For the map (city, offer type, latest day) and the scrape dates
+    cursor.execute(f"""
+        CREATE INDEX latest_listing_city_offer_date_idx
+        ON {LATEST_LISTING_TABLE} (
+            address_locality, offer_type, scrape_date
+        );
+    """)
+    cursor.execute(f"""
+        CREATE INDEX latest_listing_date_idx
+        ON {LATEST_LISTING_TABLE} (scrape_date);
+    """)
+
+    # Superseded by the catalog
+    cursor.execute("DROP TABLE IF EXISTS latest_locality_per_day;")
+
+    print(f"Creating table {ROLLUP_TABLE}...")
+    cursor.execute(f"DROP TABLE IF EXISTS {ROLLUP_TABLE};")
+    cursor.execute(f"""
+        CREATE TABLE {ROLLUP_TABLE} (
+            date TEXT NOT NULL,
+            address_locality TEXT NOT NULL,
+            offer_type TEXT,
+            n_listings INTEGER NOT NULL,
+            n_price INTEGER NOT NULL,
+            sum_price REAL NOT NULL,
+            sum_price_sq REAL NOT NULL,
+            n_square_meters INTEGER NOT NULL,
+            sum_square_meters REAL NOT NULL,
+            sum_square_meters_sq REAL NOT NULL,
+            n_price_per_square_meter INTEGER NOT NULL,
+            sum_price_per_square_meter REAL NOT NULL,
+            sum_price_per_square_meter_sq REAL NOT NULL,
+            PRIMARY KEY (date, address_locality, offer_type)
+        );
+    """)
+
+    print(f"Creating table {PERCENTILE_TABLE}...")
+    cursor.execute(f"DROP TABLE IF EXISTS {PERCENTILE_TABLE};")
+    percentile_columns = "".join(
+        f"{column} REAL,\n" for column in PERCENTILE_COLUMNS
+    )
+    # City and offer type first, so the latest date of one is an index seek
+    cursor.execute(f"""
+        CREATE TABLE {PERCENTILE_TABLE} (
+            address_locality TEXT NOT NULL,
+            offer_type TEXT,
+            date TEXT NOT NULL,
+            n_listings INTEGER NOT NULL,
+            {percentile_columns}
+            PRIMARY KEY (address_locality, offer_type, date)
+        );
+    """)
+    cursor.execute(f"""
+        CREATE INDEX daily_city_offer_percentiles_date_idx
+        ON {PERCENTILE_TABLE} (date);
+    """)
+
+    print(f"Creating table {CATALOG_TABLE}...")
+    cursor.execute(f"DROP TABLE IF EXISTS {CATALOG_TABLE};")
+    cursor.execute(f"""
+        CREATE TABLE {CATALOG_TABLE} (
+            date TEXT NOT NULL,
+            address_locality TEXT NOT NULL,
+            offer_type TEXT,
+            n_listings INTEGER NOT NULL,
+            PRIMARY KEY (date, address_locality, offer_type)
+        );
+    """)
+
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            name TEXT PRIMARY KEY,
+            high_water_mark INTEGER NOT NULL
+        );
+    """)
+    cursor.execute(f"DELETE FROM {STATE_TABLE};")
+
+
+def _needs_rebuild(cursor) -> bool:
+    listing_columns = _table_columns(cursor, LISTING_TABLE)
+    latest_columns = _table_columns(cursor, LATEST_LISTING_TABLE)
+    # Also true if a table is missing or a migration added a column
+    return (
+        latest_columns != [*listing_columns, *LATEST_LISTING_EXTRA_COLUMNS]
+        or not _table_columns(cursor, ROLLUP_TABLE)
+        or not _table_columns(cursor, PERCENTILE_TABLE)
+        or not _table_columns(cursor, CATALOG_TABLE)
+        or not _table_columns(cursor, DATA_VERSION_TABLE)
+        or not _table_columns(cursor, STATE_TABLE)
+    )
+
+
+def _load_high_water_mark(cursor, name: str) -> int:
+    cursor.execute(
+        f"SELECT high_water_mark FROM {STATE_TABLE} WHERE name = %s;",
+        [name],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def _new_scrape_dates(cursor, table: str) -> tuple[set[str], int]:
+    """Scrape dates of the rows added to the table since the last refresh,
+    and the new high-water mark."""
+    high_water_mark = _load_high_water_mark(cursor, table)
+    cursor.execute(f"SELECT MAX(id) FROM {table};")
+    new_high_water_mark = cursor.fetchone()[0] or 0
+    cursor.execute(
+        f"""
+        SELECT DISTINCT scrape_date
+        FROM {table}
+        WHERE id > %s AND id <= %s AND scrape_date IS NOT NULL;
+        """,
+        [high_water_mark, new_high_water_mark],
+    )
+    return {str(row[0]) for row in cursor.fetchall()}, new_high_water_mark
+
+
+def _save_high_water_mark(cursor, name: str, high_water_mark: int) -> None:
+    cursor.execute(
+        f"""
+        INSERT INTO {STATE_TABLE} (name, high_water_mark)
+        VALUES (%s, %s)
+        ON CONFLICT (name) DO UPDATE
+        SET high_water_mark = excluded.high_water_mark;
+        """,
+        [name, high_water_mark],
+    )
+
+
+def _replace_scrape_dates(
+    cursor, table: str, date_column: str, query: str, scrape_dates_json: str
+) -> None:
+    cursor.execute(
+        f"""
+        DELETE FROM {table}
+        WHERE {date_column} IN (SELECT value FROM json_each(%s));
+        """,
+        [scrape_dates_json],
+    )
+    cursor.execute(f"INSERT INTO {table} {query};", [scrape_dates_json])
+
+
+def _bump_data_version(cursor) -> None:
+    cursor.execute(f"""
+        INSERT INTO {DATA_VERSION_TABLE} (id, version)
+        VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET version = version + 1;
+    """)
+
+
+def refresh(cursor, full: bool) -> None:
+    rebuild = full or _needs_rebuild(cursor)
+    if rebuild:
+        _create_tables(cursor)
+
+    listing_dates, listing_high_water_mark = _new_scrape_dates(
+        cursor, LISTING_TABLE
+    )
+    sighting_dates, sighting_high_water_mark = _new_scrape_dates(
+        cursor, SIGHTING_TABLE
+    )
+    scrape_dates = sorted(listing_dates | sighting_dates)
+    if not scrape_dates:
+        print("No new listings, nothing to refresh")
+        if rebuild:
+            _bump_data_version(cursor)
+        return
+
+    print(f"Refreshing {len(scrape_dates)} scrape dates: {scrape_dates}")
+    scrape_dates_json = json.dumps(scrape_dates)
+    # In this order, each table is computed from the one refreshed before
+    _replace_scrape_dates(
+        cursor,
+        LATEST_LISTING_TABLE,
+        "scrape_date",
+        latest_listing_query(_table_columns(cursor, LISTING_TABLE)),
+        scrape_dates_json,
+    )
+    _replace_scrape_dates(
+        cursor,
+        ROLLUP_TABLE,
+        "date",
+        QUERY_DAILY_CITY_OFFER_ROLLUP,
+        scrape_dates_json,
+    )
+    _replace_scrape_dates(
+        cursor,
+        PERCENTILE_TABLE,
+        "date",
+        QUERY_DAILY_CITY_OFFER_PERCENTILES,
+        scrape_dates_json,
+    )
+    _replace_scrape_dates(
+        cursor, CATALOG_TABLE, "date", QUERY_LISTING_CATALOG, scrape_dates_json
+    )
+
+    _save_high_water_mark(cursor, LISTING_TABLE, listing_high_water_mark)
+    _save_high_water_mark(cursor, SIGHTING_TABLE, sighting_high_water_mark)
+    _bump_data_version(cursor)
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Refresh the materialized tables for the scrape dates that got"
+            " new listings since the last run"
+        )
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Rebuild the tables from scratch"
+    )
+    args = parser.parse_args()
+
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wgwatch.settings")
     django.setup()
 
+    # SQLite DDL is transactional, so the app keeps reading the previous
+    # tables until the refresh is committed, even during a full rebuild
+    with transaction.atomic(), connection.cursor() as cursor:
+        refresh(cursor, full=args.full)
+
+    # Moves the WAL into db.sqlite3, which is copied into the app's image
     with connection.cursor() as cursor:
-        print("Creating table latest_realestatelisting_per_day...")
-        cursor.execute("""
-            DROP TABLE IF EXISTS latest_realestatelisting_per_day;
-        """)
-        cursor.execute("""
-            CREATE TABLE latest_realestatelisting_per_day AS
-            SELECT *
-            FROM (
-                SELECT *,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY url, DATE(job_insert_time)
-                        ORDER BY job_insert_time DESC
-                    ) AS rn
-                FROM wgwatch_realestatelisting
-            ) t
-            WHERE t.rn = 1;
-        """)
-
-        print("Creating table scrape_dates_by_city...")
-        cursor.execute("DROP TABLE IF EXISTS latest_locality_per_day;")
-        cursor.execute("""
-            CREATE TABLE latest_locality_per_day (
-                address_locality TEXT NOT NULL,
-                date TEXT NOT NULL,
-                PRIMARY KEY (address_locality, date)
-            );
-        """)
-        cursor.execute("""
-            INSERT INTO latest_locality_per_day (address_locality, date)
-            SELECT
-                address_locality,
-                DATE(job_insert_time) AS date
-            FROM wgwatch_realestatelisting
-            GROUP BY address_locality, date;
-        """)
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
 
 
 if __name__ == "__main__":
@@ -10,43 +10,45 @@ logger = logging.getLogger(__name__)
 
 
 def _format_address(address: dict) -> str:
-    address_formatted = (
-        f"{address['street_address']}, {address['address_locality']}, "
-        f"{address['address_region']}, {address['postal_code']}, "
-        f"{address['address_country']}"
-    )
+    address_parts = [
+        address["street_address"],
+        address["address_locality"],
+        address["address_region"],
+        address["postal_code"],
+        address["address_country"],
+    ]
+    # Addresses with missing parts are geocoded from the remaining ones
+    address_formatted = ", ".join(part for part in address_parts if part)
 
     return address_formatted
 
 
-def _load_addresses() -> list[dict]:
-    query_select_addresses = """
+QUERY_SELECT_ADDRESSES = """
 -- SQLite
-select distinct
+select
 
-    listings.street_address,
-    listings.address_locality,
-    listings.postal_code,
-    listings.address_region,
-    listings.address_country
+    addresses.id,
+    addresses.street_address,
+    addresses.address_locality,
+    addresses.postal_code,
+    addresses.address_region,
+    addresses.address_country
 
-from wgwatch_realestatelisting
-    as listings
+from wgwatch_address
+    as addresses
 
 left join wgwatch_realestatelocation
     as locations
 
-on listings.street_address = locations.street_address
-and listings.address_locality = locations.address_locality
-and listings.postal_code = locations.postal_code
-and listings.address_region = locations.address_region
-and listings.address_country = locations.address_country
+on addresses.id = locations.address_id
 
-where locations.street_address is null
+where locations.id is null
 """
 
+
+def _load_addresses() -> list[dict]:
     with connection.cursor() as cursor:
-        cursor.execute(query_select_addresses)
+        cursor.execute(QUERY_SELECT_ADDRESSES)
         columns = [col[0] for col in cursor.description]
         rows = cursor.fetchall()
 
@@ -83,6 +85,7 @@ def geocode_locations(
                     address_region=address["address_region"],
                     postal_code=address["postal_code"],
                     address_country=address["address_country"],
+                    address_id=address["id"],
                     latitude=latitude,
                     longitude=longitude,
                 )
@@ -0,0 +1,9 @@
+select
+
+    date,
+    address_locality,
+    offer_type,
+    n_listings
+
+from listing_catalog
+;
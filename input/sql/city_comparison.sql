@@ -1,32 +1,34 @@
 
 select
 
-        date(job_insert_time) AS scraped_date,
+        {% if bucket == "week" %}date(date, 'weekday 0', '-6 days'){% elif bucket == "month" %}date(date, 'start of month'){% else %}date{% endif %} AS scraped_date,
         offer_type,
 
-        {% for city in selected_cities %}
-        AVG(CASE WHEN address_locality = '{{ city }}' THEN price END) AS avg_price_city_{{ loop.index }}{% if not loop.last %},{% endif %}
+        {% for i in range(1, n_cities + 1) %}
+        SUM(CASE WHEN address_locality = %(city_{{ i }})s THEN sum_price END) / SUM(CASE WHEN address_locality = %(city_{{ i }})s THEN NULLIF(n_price, 0) END) AS avg_price_city_{{ i }}{% if not loop.last %},{% endif %}
         {% endfor %},
 
-        {% for city in selected_cities %}
-        AVG(CASE WHEN address_locality = '{{ city }}' THEN square_meters END) AS avg_square_meters_city_{{ loop.index }}{% if not loop.last %},{% endif %}
+        {% for i in range(1, n_cities + 1) %}
+        SUM(CASE WHEN address_locality = %(city_{{ i }})s THEN sum_square_meters END) / SUM(CASE WHEN address_locality = %(city_{{ i }})s THEN NULLIF(n_square_meters, 0) END) AS avg_square_meters_city_{{ i }}{% if not loop.last %},{% endif %}
         {% endfor %},
 
-        {% for city in selected_cities %}
-        AVG(CASE WHEN address_locality = '{{ city }}' THEN price / NULLIF(square_meters, 0) END) AS avg_price_per_square_meter_city_{{ loop.index }}{% if not loop.last %},{% endif %}
+        {% for i in range(1, n_cities + 1) %}
+        SUM(CASE WHEN address_locality = %(city_{{ i }})s THEN sum_price_per_square_meter END) / SUM(CASE WHEN address_locality = %(city_{{ i }})s THEN NULLIF(n_price_per_square_meter, 0) END) AS avg_price_per_square_meter_city_{{ i }}{% if not loop.last %},{% endif %}
         {% endfor %},
 
-        {% for city in selected_cities %}
-        COUNT(CASE WHEN address_locality = '{{ city }}' THEN 1 END) AS number_of_listings_city_{{ loop.index }}{% if not loop.last %},{% endif %}
+        {% for i in range(1, n_cities + 1) %}
+        COALESCE(CAST(ROUND(1.0 * SUM(CASE WHEN address_locality = %(city_{{ i }})s THEN n_listings END) / COUNT(DISTINCT CASE WHEN address_locality = %(city_{{ i }})s THEN date END)) AS INTEGER), 0) AS number_of_listings_city_{{ i }}{% if not loop.last %},{% endif %}
         {% endfor %}
 
 
-FROM latest_realestatelisting_per_day
+FROM daily_city_offer_rollup
+
+WHERE date BETWEEN %(date_from)s AND %(date_to)s
 
 GROUP BY
-    date(job_insert_time),
+    scraped_date,
     offer_type
 
 ORDER BY
     scraped_date DESC,
-    offer_type;
\ No newline at end of file
+    offer_type;
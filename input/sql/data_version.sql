@@ -0,0 +1 @@
+select version from data_version where id = 1;
@@ -0,0 +1,38 @@
+select
+
+    listing.scrape_date,
+    listing.address_locality,
+    listing.offer_type,
+    listing.name,
+    listing.url,
+    listing.date_posted,
+    listing.price,
+    listing.price_currency,
+    listing.square_meters,
+    listing.price_rank_normalized,
+    listing.availability,
+    listing.provider_name,
+    listing.street_address,
+    listing.postal_code,
+    listing.address_region,
+    listing.address_country,
+
+    location.latitude,
+    location.longitude
+
+from latest_realestatelisting_per_day
+    as listing
+
+left join wgwatch_realestatelocation
+    as location
+
+on listing.address_id = location.address_id
+
+where listing.scrape_date between %(date_from)s and %(date_to)s
+{% if by_city %}
+and listing.address_locality = %(city)s
+{% endif %}
+{% if by_offer_type %}
+and listing.offer_type = %(offer_type)s
+{% endif %}
+;
@@ -0,0 +1,31 @@
+select
+
+    listing.name,
+    listing.url,
+    listing.price,
+    listing.square_meters,
+    listing.price_rank_normalized,
+
+    location.latitude,
+    location.longitude
+
+from latest_realestatelisting_per_day
+    as listing
+
+inner join wgwatch_realestatelocation
+    as location
+
+on listing.address_id = location.address_id
+
+where listing.address_locality = %(city)s
+and listing.offer_type = %(offer_type)s
+and listing.scrape_date = (
+    select
+        max(date)
+    from daily_city_offer_percentiles
+    where address_locality = %(city)s
+    and offer_type = %(offer_type)s
+)
+and location.latitude is not null
+and location.longitude is not null
+;
@@ -0,0 +1,66 @@
+import datetime
+import gzip
+import hashlib
+import logging
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivedPage(BaseModel):
+    city: str
+    page_number: int
+    fetched_at: datetime.datetime
+    sha256: str
+    run_id: str | None = None
+
+
+class PageArchive:
+    """Content-addressed, gzip compressed store of fetched results pages.
+
+    Pages live under <archive_dir>/<sha256[:2]>/<sha256>.html.gz, the
+    index.jsonl next to them records which city and page was fetched when.
+    """
+
+    def __init__(self, archive_dir: Path) -> None:
+        self.archive_dir = archive_dir
+        self.index_path = archive_dir / "index.jsonl"
+
+    def _page_path(self, sha256: str) -> Path:
+        return self.archive_dir / sha256[:2] / f"{sha256}.html.gz"
+
+    def store(self, html: str) -> str:
+        content = html.encode()
+        sha256 = hashlib.sha256(content).hexdigest()
+        page_path = self._page_path(sha256)
+        if not page_path.exists():
+            page_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a
+            # truncated page behind
+            tmp_path = page_path.with_name(
+                f"{page_path.name}.{os.getpid()}.tmp"
+            )
+            tmp_path.write_bytes(gzip.compress(content, compresslevel=6))
+            tmp_path.replace(page_path)
+
+        return sha256
+
+    def record(self, archived_page: ArchivedPage) -> None:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        with self.index_path.open("a") as f:
+            f.write(archived_page.model_dump_json() + "\n")
+
+    def load(self, sha256: str) -> str:
+        return gzip.decompress(self._page_path(sha256).read_bytes()).decode()
+
+    def entries(self) -> Iterator[ArchivedPage]:
+        if not self.index_path.exists():
+            return
+        with self.index_path.open() as f:
+            for line in f:
+                if line.strip():
+                    yield ArchivedPage.model_validate_json(line)
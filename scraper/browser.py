@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import zendriver as zd
+from zendriver.core.connection import ProtocolException
+
+logger = logging.getLogger(__name__)
+
+# Evaluates to "ready" once the listings payload and the pagination are in
+# the DOM, "captcha" while a CAPTCHA is shown and "loading" otherwise
+_PAGE_STATE_JS = """
+(() => {
+    const hasPayload = Array.from(
+        document.querySelectorAll("head > script")
+    ).some((script) => script.textContent.includes('@type": "Product",'));
+    if (hasPayload && document.getElementById("assets_list_pagination")) {
+        return "ready";
+    }
+    const html = document.documentElement.outerHTML.toLowerCase();
+    return html.includes("g-recaptcha") ? "captcha" : "loading";
+})()
+"""
+
+
+class BrowserPool:
+    """One long-lived browser handing out tabs to concurrent workers.
+
+    A tab whose worker failed is closed and replaced by a fresh one on the
+    next checkout. The browser itself is only restarted if it died.
+    """
+
+    def __init__(self, headless: bool, max_tabs: int) -> None:
+        self.headless = headless
+        self.max_tabs = max_tabs
+        self._browser: zd.Browser | None = None
+        self._idle_tabs: list[zd.Tab] = []
+        self._tab_slots = asyncio.Semaphore(max_tabs)
+        self._browser_lock = asyncio.Lock()
+
+    async def _get_browser(self) -> zd.Browser:
+        async with self._browser_lock:
+            if self._browser is None or self._browser.stopped:
+                if self._browser is not None:
+                    logger.warning("Browser died — restarting")
+                    self._idle_tabs.clear()
+                self._browser = await zd.start(
+                    config=zd.Config(
+                        sandbox=True,
+                        headless=self.headless,
+                        browser_connection_timeout=2,
+                        browser_connection_max_tries=10,
+                    )
+                )
+            return self._browser
+
+    async def _open_tab(self) -> zd.Tab:
+        browser = await self._get_browser()
+        while self._idle_tabs:
+            tab = self._idle_tabs.pop()
+            if not tab.closed:
+                return tab
+        return await browser.get("about:blank", new_tab=True)
+
+    async def _discard_tab(self, tab: zd.Tab) -> None:
+        try:
+            await tab.close()
+        except (ProtocolException, RuntimeError, TimeoutError, OSError) as e:
+            logger.warning(f"Could not close tab: {e}")
+
+    @asynccontextmanager
+    async def tab(self) -> AsyncIterator[zd.Tab]:
+        async with self._tab_slots:
+            tab = await self._open_tab()
+            try:
+                yield tab
+            except BaseException:
+                await self._discard_tab(tab)
+                raise
+            self._idle_tabs.append(tab)
+
+    async def stop(self) -> None:
+        async with self._browser_lock:
+            if self._browser is not None:
+                await self._browser.stop()
+            self._browser = None
+            self._idle_tabs.clear()
+
+
+async def wait_for_results_page(
+    tab: zd.Tab, timeout: float, poll_interval: float
+) -> str:
+    """Return the page content as soon as the results have rendered.
+
+    The timeout is suspended while a CAPTCHA is shown, so it can be solved
+    by hand.
+    """
+    deadline = time.monotonic() + timeout
+    captcha_shown = False
+    while True:
+        try:
+            page_state = await tab.evaluate(_PAGE_STATE_JS)
+        except ProtocolException:
+            # The document can be swapped out while it is being evaluated
+            page_state = "loading"
+        if page_state == "ready":
+            return await tab.get_content()
+
+        if page_state == "captcha":
+            if not captcha_shown:
+                logger.warning(f"CAPTCHA detected on {tab.url} — waiting")
+                captcha_shown = True
+        elif captcha_shown:
+            # Start over once the CAPTCHA has been solved
+            captcha_shown = False
+            deadline = time.monotonic() + timeout
+        elif time.monotonic() > deadline:
+            raise TimeoutError(
+                f"Results page not ready after {timeout} seconds: {tab.url}"
+            )
+
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,45 @@
+import logging
+from typing import TYPE_CHECKING
+
+from asgiref.sync import sync_to_async
+
+if TYPE_CHECKING:
+    from wgwatch.models import ScrapeCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+@sync_to_async
+def load_checkpoint(run_id: str, city: str) -> "ScrapeCheckpoint | None":
+    from wgwatch.models import ScrapeCheckpoint
+
+    return ScrapeCheckpoint.objects.filter(run_id=run_id, city=city).first()
+
+
+def update_checkpoints(
+    run_id: str,
+    committed_pages: dict[str, int],
+    finished_cities: list[str],
+) -> None:
+    """Record progress, must run in the transaction that saved the pages."""
+    from wgwatch.models import ScrapeCheckpoint
+
+    for city, page_number in committed_pages.items():
+        checkpoint, created = ScrapeCheckpoint.objects.get_or_create(
+            run_id=run_id,
+            city=city,
+            defaults={"last_committed_page": page_number},
+        )
+        if not created and (
+            checkpoint.last_committed_page is None
+            or checkpoint.last_committed_page < page_number
+        ):
+            checkpoint.last_committed_page = page_number
+            checkpoint.save(update_fields=["last_committed_page", "updated_at"])
+
+    for city in finished_cities:
+        ScrapeCheckpoint.objects.update_or_create(
+            run_id=run_id,
+            city=city,
+            defaults={"status": ScrapeCheckpoint.Status.FINISHED},
+        )
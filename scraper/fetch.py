@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from types import TracebackType
+from typing import Self
+
+import requests
+import zendriver as zd
+from requests.adapters import HTTPAdapter
+
+from .browser import BrowserPool, wait_for_results_page
+
+logger = logging.getLogger(__name__)
+
+_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36"
+        " (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "de-DE,de;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+def is_complete_results_page(html: str) -> bool:
+    return (
+        '@type": "Product",' in html
+        and 'id="assets_list_pagination"' in html
+        and "g-recaptcha" not in html.lower()
+    )
+
+
+class HttpFetcher:
+    """Fetches results pages through one pooled keep-alive session."""
+
+    def __init__(self, max_connections: int, timeout: float) -> None:
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.headers.update(_HEADERS)
+        # Blocks instead of opening more than max_connections per host
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connections, pool_block=True
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def _get(self, url: str) -> requests.Response:
+        return self._session.get(url, timeout=self.timeout)
+
+    async def fetch(self, url: str) -> str | None:
+        """Return the page, or None if it needs a real browser."""
+        try:
+            response = await asyncio.to_thread(self._get, url)
+        except requests.RequestException as e:
+            logger.warning(f"HTTP fetch failed for {url}: {e}")
+            return None
+
+        if response.status_code != 200:
+            logger.warning(f"HTTP {response.status_code} for {url}")
+            return None
+        # Without a charset in the header requests decodes text/html as
+        # ISO-8859-1, the pages declare UTF-8 in their <meta charset>
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            response.encoding = "utf-8"
+        html = response.text
+        if not is_complete_results_page(html):
+            logger.warning(f"CAPTCHA or incomplete page over HTTP: {url}")
+            return None
+
+        return html
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class PageFetcher:
+    """Fetches one city's pages, over HTTP first if an HttpFetcher is given.
+
+    A browser tab is only checked out of the pool once a page needs it and
+    is then kept until the fetcher is closed.
+    """
+
+    def __init__(
+        self,
+        browser_pool: BrowserPool,
+        http_fetcher: HttpFetcher | None,
+        page_ready_timeout: float,
+        page_ready_poll_interval: float,
+    ) -> None:
+        self.browser_pool = browser_pool
+        self.http_fetcher = http_fetcher
+        self.page_ready_timeout = page_ready_timeout
+        self.page_ready_poll_interval = page_ready_poll_interval
+        self._exit_stack = AsyncExitStack()
+        self._tab: zd.Tab | None = None
+
+    async def __aenter__(self) -> Self:
+        await self._exit_stack.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        # Hands the tab back to the pool, which discards it on errors
+        return await self._exit_stack.__aexit__(exc_type, exc, traceback)
+
+    async def fetch(self, url: str) -> str:
+        if self.http_fetcher is not None:
+            html = await self.http_fetcher.fetch(url)
+            if html is not None:
+                return html
+            logger.info(f"Falling back to the browser for {url}")
+
+        if self._tab is None:
+            self._tab = await self._exit_stack.enter_async_context(
+                self.browser_pool.tab()
+            )
+        page = await self._tab.get(url)
+        return await wait_for_results_page(
+            page,
+            timeout=self.page_ready_timeout,
+            poll_interval=self.page_ready_poll_interval,
+        )
@@ -0,0 +1,60 @@
+import logging
+from typing import Literal
+
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+# new: never seen before, changed: seen with a different content hash,
+# unchanged: seen with the same content hash, duplicate: already scraped
+# in this run (e.g. because listings shifted across pages)
+ListingStatus = Literal["new", "changed", "unchanged", "duplicate"]
+
+
+class SeenListingIndex:
+    """Content hashes of known listings, keyed by listing id."""
+
+    def __init__(self, content_hashes: dict[int, str]) -> None:
+        self._content_hashes = content_hashes
+        self._seen_this_run: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._content_hashes)
+
+    def classify(
+        self, listing_id: int | None, content_hash: str
+    ) -> ListingStatus:
+        if listing_id is None:
+            return "new"
+        if listing_id in self._seen_this_run:
+            return "duplicate"
+        self._seen_this_run.add(listing_id)
+
+        known_content_hash = self._content_hashes.get(listing_id)
+        self._content_hashes[listing_id] = content_hash
+        if known_content_hash is None:
+            return "new"
+        if known_content_hash != content_hash:
+            return "changed"
+        return "unchanged"
+
+    def forget(self, listing_id: int | None, status: ListingStatus) -> None:
+        """Undo classify for a listing that could not be written."""
+        if listing_id is None or status == "duplicate":
+            return
+        self._seen_this_run.discard(listing_id)
+        if status != "unchanged":
+            # Its stored hash may be older, so the next sighting stores it
+            self._content_hashes.pop(listing_id, None)
+
+
+@sync_to_async
+def load_seen_listing_index() -> SeenListingIndex:
+    from wgwatch.models import SeenListing
+
+    content_hashes = dict(
+        SeenListing.objects.values_list("listing_id", "content_hash")
+    )
+    logger.info(f"Loaded {len(content_hashes)} seen listings")
+
+    return SeenListingIndex(content_hashes)
@@ -1,18 +1,40 @@
 import asyncio
+import datetime
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
 import re
-from typing import List, Literal, Optional
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Literal, Optional
 
 import django
-import zendriver as zd
 from asgiref.sync import sync_to_async
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+from django.db import transaction
 from django.utils import timezone
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from .archive import ArchivedPage, PageArchive
+from .browser import BrowserPool
+from .checkpoints import load_checkpoint, update_checkpoints
+from .fetch import HttpFetcher, PageFetcher
+from .incremental import (
+    ListingStatus,
+    SeenListingIndex,
+    load_seen_listing_index,
+)
+from .pipeline import StageStats, log_pipeline_stats, report_pipeline_stats
+
+if TYPE_CHECKING:
+    from wgwatch.models import RealEstateListing
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,9 +72,25 @@ class RealEstateListingScraped(BaseModel):
     image: Optional[HttpUrl] = None
 
 
+class ListingCardDetails(BaseModel):
+    square_meters: int | None
+    rooms: float | None
+
+
 class RealEstateListingScrapedWithAdditions(BaseModel):
     listings_scraped: RealEstateListingScraped
     square_meters: int | None
+    rooms: float | None = None
+    listing_id: int | None = None
+
+    def content_hash(self) -> str:
+        content = [
+            self.listings_scraped.offers.price,
+            self.square_meters,
+            self.listings_scraped.name,
+            self.listings_scraped.description,
+        ]
+        return hashlib.sha256(json.dumps(content).encode()).hexdigest()
 
 
 class ListItem(BaseModel):
@@ -107,22 +145,57 @@ class ScraperConfig(BaseSettings):
     )
 
     cities: Optional[list[City]] = None
+    # Progress is checkpointed per run, restarting with the same run id
+    # resumes each city after its last saved page
+    run_id: str = Field(
+        default_factory=lambda: (
+            datetime.datetime.now(datetime.UTC).date().isoformat()
+        )
+    )
     headless: bool = False
     start_at_page: int = 0
     max_concurrent: int = 3
     max_pages_to_scrape: int = 30
-
-
-def get_wg_gesucht_url(city: City, page: int) -> str:
+    # "http" fetches pages with a pooled HTTP session and only falls back to
+    # the browser on CAPTCHAs or incomplete pages
+    fetch_backend: Literal["browser", "http"] = "browser"
+    http_timeout: float = 30
+    base_url: str = "https://www.wg-gesucht.de"
+    # Keep a compressed copy of every fetched page for `scraper.replay`
+    archive_dir: Path | None = None
+    # Seconds to wait for a results page to render (not counting CAPTCHAs)
+    page_ready_timeout: float = 30
+    page_ready_poll_interval: float = 0.25
+    # Seconds to pause between two pages of the same city
+    politeness_delay: float = 1
+    # Only store new or changed listings, stop paginating a city once a page
+    # consists (almost) entirely of known, unchanged listings
+    incremental: bool = False
+    incremental_stop_ratio: float = 0.9
+    # Pipeline between fetching, parsing and writing pages
+    parse_processes: int = 2
+    parse_queue_size: int = 10
+    write_queue_size: int = 20
+    write_batch_size: int = 500
+    # Attempts to save a batch before the run of its cities is given up
+    write_retries: int = 3
+    stats_interval: float = 60
+
+
+def get_wg_gesucht_url(
+    city: City, page: int, base_url: str = "https://www.wg-gesucht.de"
+) -> str:
     URL_TEMPLATE = (
-        "https://www.wg-gesucht.de/wg-zimmer-und-1-zimmer-wohnungen-und-wohnungen-und-haeuser"
+        "{base_url}/wg-zimmer-und-1-zimmer-wohnungen-und-wohnungen-und-haeuser"
         "-in-{city}.{city_id}.0+1+2+3.1.{page}.html?offer_filter=1"
         "&city_id={city_id}&sort_order=0&noDeact=1&categories%5B%5D=0"
         "&categories%5B%5D=1&categories%5B%5D=2&categories%5B%5D=3&pagination=4&pu="
     )
 
     city_id = city_to_id[city]
-    return URL_TEMPLATE.format(city=city, city_id=city_id, page=page)
+    return URL_TEMPLATE.format(
+        base_url=base_url, city=city, city_id=city_id, page=page
+    )
 
 
 def _extract_listing_id_from_url(url: str) -> int:
@@ -142,58 +215,255 @@ def _extract_listing_id_from_url(url: str) -> int:
         raise RuntimeError(f"No listing id could be extracted from url: {url}")
 
 
-def _get_square_meters(soup: BeautifulSoup, listing_id: int) -> int | None:
-    listing_data_id_result = soup.find_all(attrs={"data-id": str(listing_id)})
+_AREA_PATTERN = re.compile(r"\b\d+\s?m²\b")
+_ROOMS_PATTERN = re.compile(r"(\d+(?:,\d+)?)-Zimmer")
 
-    soup_listing_data_id = BeautifulSoup(
-        str(listing_data_id_result), "html.parser"
-    )
 
-    # Find all bold tags (<b>) that contain the square meter info
-    bold_tags = soup_listing_data_id.find_all("b")
+def _card_details_from_texts(
+    bold_texts: list[str], header_text: str | None
+) -> ListingCardDetails:
+    square_meters: int | None = None
 
-    # Use regex to extract patterns like '22 m²'
-    area_pattern = re.compile(r"\b\d+\s?m²\b")
-
-    for tag in bold_tags:
-        text = tag.get_text(strip=True)
-        match_area = area_pattern.search(text)
-        if match_area:
+    for text in bold_texts:
+        # Use regex to extract patterns like '22 m²'
+        if _AREA_PATTERN.search(text):
             match_area_number = re.search(r"\d+", text)
             if match_area_number:
-                area_number = int(match_area_number.group())
-                return area_number
+                square_meters = int(match_area_number.group())
+                break
 
-    return None
+    # The card header reads e.g. '2,5-Zimmer-Wohnung | Köln Sülz | ...'
+    rooms: float | None = None
+    if header_text:
+        match_rooms = _ROOMS_PATTERN.search(header_text)
+        if match_rooms:
+            rooms = float(match_rooms.group(1).replace(",", "."))
+
+    return ListingCardDetails(square_meters=square_meters, rooms=rooms)
+
+
+def _parse_listing_card(card: Tag) -> ListingCardDetails:
+    # Find all bold tags (<b>) that contain the square meter info
+    bold_texts = [tag.get_text(strip=True) for tag in card.find_all("b")]
+    header = card.select_one("div.col-xs-11 > span")
+
+    return _card_details_from_texts(
+        bold_texts=bold_texts,
+        header_text=header.get_text() if header else None,
+    )
+
+
+def _build_listing_card_index(
+    soup: BeautifulSoup,
+) -> dict[int, ListingCardDetails]:
+    # Single pass over the page instead of one document search per listing
+    index: dict[int, ListingCardDetails] = {}
+    for card in soup.select("[data-id]"):
+        data_id = str(card["data-id"])
+        if not data_id.isdigit():
+            continue
+        listing_id = int(data_id)
+        # Keep the first card in document order, like a lookup by id would
+        if listing_id not in index:
+            index[listing_id] = _parse_listing_card(card)
+
+    return index
 
 
 def _extract_and_add_square_meters(
-    html_soup: BeautifulSoup,
+    card_index: dict[int, ListingCardDetails],
     scraped_real_estate_listings: List[RealEstateListingScraped],
 ) -> list[RealEstateListingScrapedWithAdditions]:
     listings_scraped_with_additions = []
     for listing in scraped_real_estate_listings:
-        square_meters: int | None = None
+        card_details: ListingCardDetails | None = None
+        listing_id: int | None = None
         if listing.url:
             listing_id = _extract_listing_id_from_url(url=str(listing.url))
-            square_meters = _get_square_meters(
-                soup=html_soup, listing_id=listing_id
-            )
+            card_details = card_index.get(listing_id)
         scraped_with_addition = RealEstateListingScrapedWithAdditions(
-            listings_scraped=listing, square_meters=square_meters
+            listings_scraped=listing,
+            square_meters=(
+                card_details.square_meters if card_details else None
+            ),
+            rooms=card_details.rooms if card_details else None,
+            listing_id=listing_id,
         )
         listings_scraped_with_additions.append(scraped_with_addition)
 
     return listings_scraped_with_additions
 
 
+class ParsedResultsPage(BaseModel):
+    city: City
+    page_number: int
+    last_page: int
+    listings: list[RealEstateListingScrapedWithAdditions]
+    fetched_at: datetime.datetime | None = None
+    # Only set in incremental mode, one status per listing
+    listing_statuses: list[ListingStatus] = []
+
+    def listings_with_status(
+        self, *statuses: ListingStatus
+    ) -> list[RealEstateListingScrapedWithAdditions]:
+        return [
+            listing
+            for listing, status in zip(self.listings, self.listing_statuses)
+            if status in statuses
+        ]
+
+    def listings_to_store(self) -> list[RealEstateListingScrapedWithAdditions]:
+        if not self.listing_statuses:
+            return self.listings
+        return self.listings_with_status("new", "changed")
+
+    def known_ratio(self) -> float:
+        if not self.listing_statuses:
+            return 0.0
+        n_known = len(self.listings_with_status("unchanged", "duplicate"))
+        return n_known / len(self.listing_statuses)
+
+
+class CityFinished(BaseModel):
+    city: City
+
+
+class CityWriteError(Exception):
+    """A city's pages could not be saved, so its run has to stop."""
+
+
 @sync_to_async
 def bulk_insert_listings(
+    parsed_pages: list[ParsedResultsPage],
+    run_id: str | None,
+    finished_cities: list[City],
+) -> None:
+    from wgwatch.models import (
+        Address,
+        ListingSighting,
+        ListingText,
+        RealEstateListing,
+        SeenListing,
+    )
+
+    now = timezone.now()
+    listings_to_store: list[RealEstateListingScrapedWithAdditions] = []
+    django_listings: list[RealEstateListing] = []
+    # Listing id -> sighting without its snapshot yet
+    sightings: dict[int, ListingSighting] = {}
+    for parsed_page in parsed_pages:
+        listings = parsed_page.listings_to_store()
+        listings_to_store.extend(listings)
+        django_listings.extend(
+            build_django_listings(
+                scraped_real_estate_listings=listings,
+                current_page=parsed_page.page_number,
+                job_insert_time=parsed_page.fetched_at,
+            )
+        )
+        seen_at = parsed_page.fetched_at or now
+        for unchanged_listing in parsed_page.listings_with_status("unchanged"):
+            if unchanged_listing.listing_id is not None:
+                sightings[unchanged_listing.listing_id] = ListingSighting(
+                    listed_on_page=parsed_page.page_number,
+                    seen_at=seen_at,
+                    scrape_date=seen_at.astimezone(datetime.UTC).date(),
+                )
+
+    incremental = any(
+        parsed_page.listing_statuses for parsed_page in parsed_pages
+    )
+    committed_pages: dict[str, int] = {}
+    for parsed_page in parsed_pages:
+        committed_pages[parsed_page.city] = max(
+            parsed_page.page_number,
+            committed_pages.get(parsed_page.city, parsed_page.page_number),
+        )
+
+    addresses = {
+        listing.address_id: Address(
+            id=listing.address_id,
+            street_address=listing.street_address,
+            address_locality=listing.address_locality,
+            address_region=listing.address_region,
+            postal_code=listing.postal_code,
+            address_country=listing.address_country,
+        )
+        for listing in django_listings
+        if listing.address_id is not None
+    }
+
+    # Descriptions and images mostly repeat from earlier snapshots
+    texts: dict[int, ListingText] = {}
+    for listing in django_listings:
+        for text in (listing.description, listing.image):
+            if text is not None:
+                texts[text.id] = text
+
+    with transaction.atomic():
+        Address.objects.bulk_create(
+            addresses.values(), batch_size=100, ignore_conflicts=True
+        )
+        ListingText.objects.bulk_create(
+            texts.values(), batch_size=100, ignore_conflicts=True
+        )
+        RealEstateListing.objects.bulk_create(django_listings, batch_size=100)
+        if run_id is not None:
+            update_checkpoints(
+                run_id=run_id,
+                committed_pages=committed_pages,
+                finished_cities=list(finished_cities),
+            )
+        if not incremental:
+            return
+
+        SeenListing.objects.bulk_create(
+            [
+                SeenListing(
+                    listing_id=listing.listing_id,
+                    content_hash=listing.content_hash(),
+                    first_seen=now,
+                    last_seen=now,
+                    latest_snapshot=django_listing,
+                )
+                for listing, django_listing in zip(
+                    listings_to_store, django_listings
+                )
+                if listing.listing_id is not None
+            ],
+            batch_size=100,
+            update_conflicts=True,
+            unique_fields=["listing_id"],
+            update_fields=["content_hash", "last_seen", "latest_snapshot"],
+        )
+        # Unchanged listings get a sighting of their latest snapshot instead,
+        # so that data_prepper still counts them on this day
+        unchanged = SeenListing.objects.filter(listing_id__in=sightings)
+        for listing_id, snapshot_id in unchanged.values_list(
+            "listing_id", "latest_snapshot_id"
+        ):
+            sightings[listing_id].snapshot_id = snapshot_id
+        ListingSighting.objects.bulk_create(
+            [
+                sighting
+                for sighting in sightings.values()
+                if sighting.snapshot_id is not None
+            ],
+            batch_size=100,
+        )
+        unchanged.update(last_seen=now)
+
+
+def build_django_listings(
     scraped_real_estate_listings: List[RealEstateListingScrapedWithAdditions],
     current_page: int,
-) -> None:
-    from wgwatch.models import RealEstateListing
+    job_insert_time: datetime.datetime | None = None,
+) -> list["RealEstateListing"]:
+    from wgwatch.models import ListingText, RealEstateListing, address_key
 
+    job_insert_time = job_insert_time or timezone.now()
+    # bulk_create skips RealEstateListing.save, which would fill this
+    scrape_date = job_insert_time.astimezone(datetime.UTC).date()
     django_listings = []
 
     for scraped_listing_with_additions in scraped_real_estate_listings:
@@ -207,9 +477,11 @@ def bulk_insert_listings(
             listed_on_page=current_page,
             name=scraped_listing.name,
             url=str(scraped_listing.url) if scraped_listing.url else None,
-            description=scraped_listing.description,
+            description=ListingText.for_text(scraped_listing.description),
             date_posted=scraped_listing.datePosted,
-            image=str(scraped_listing.image) if scraped_listing.image else None,
+            image=ListingText.for_text(
+                str(scraped_listing.image) if scraped_listing.image else None
+            ),
             offer_type=offer.type,
             price=offer.price,
             square_meters=scraped_listing_with_additions.square_meters,
@@ -223,11 +495,23 @@ def bulk_insert_listings(
             address_region=address.addressRegion if address else None,
             postal_code=address.postalCode if address else None,
             address_country=address.addressCountry if address else None,
-            job_insert_time=timezone.now(),
+            address_id=(
+                address_key(
+                    address.streetAddress,
+                    address.addressLocality,
+                    address.addressRegion,
+                    address.postalCode,
+                    address.addressCountry,
+                )
+                if address
+                else None
+            ),
+            job_insert_time=job_insert_time,
+            scrape_date=scrape_date,
         )
         django_listings.append(listing)
 
-    RealEstateListing.objects.bulk_create(django_listings, batch_size=100)
+    return django_listings
 
 
 def parse_listings_from_listings_str(
@@ -243,66 +527,319 @@ def parse_listings_from_listings_str(
     return [li.item for li in collection.mainEntity.itemListElement]
 
 
+_JSONLD_MARKER = '@type": "Product",'
+
+
+def _clean_jsonld_script(script_content: str) -> str:
+    content = script_content.strip()[:-1]
+    return content.replace("@type", "type")
+
+
 def extract_listings(html_soup: BeautifulSoup) -> str:
     for script in html_soup.select("head > script"):
         script_content = script.text or ""
-        if '@type": "Product",' in script_content:
-            content = script_content.strip()[:-1]
-            return content.replace("@type", "type")
+        if _JSONLD_MARKER in script_content:
+            return _clean_jsonld_script(script_content)
     raise RuntimeError("No relevant <script> tag found in HTML.")
 
 
-def get_last_page_number(html_soup: BeautifulSoup) -> int:
-    pagination_div = html_soup.find(id="assets_list_pagination")
-    if not pagination_div:
-        raise ValueError("Pagination element not found.")
-    links = pagination_div.find_all("a", class_="page-link")
+def _last_page_from_link_texts(link_texts: list[str]) -> int:
     nums = []
-    for link in links:
+    for link_text in link_texts:
         try:
-            nums.append(int(link.text.strip()))
+            nums.append(int(link_text.strip()))
         except ValueError:
             continue
     return max(nums) - 1 if nums else 0
 
 
+def get_last_page_number(html_soup: BeautifulSoup) -> int:
+    pagination_div = html_soup.find(id="assets_list_pagination")
+    if not pagination_div:
+        raise ValueError("Pagination element not found.")
+    links = pagination_div.find_all("a", class_="page-link")
+    return _last_page_from_link_texts([link.text for link in links])
+
+
+class ParsedPage(BaseModel):
+    listings_str: str
+    last_page: int
+    card_index: dict[int, ListingCardDetails]
+
+
+class _PageTokenizer(HTMLParser):
+    """Streaming extractor for the parts of a results page we need.
+
+    Collects the JSON-LD script from <head>, the result cards and the
+    pagination links without building a DOM. Listing cards precede the
+    pagination, so the tokenizer is done once the pagination closes.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.listings_str: str | None = None
+        self.page_link_texts: list[str] | None = None
+        self.card_index: dict[int, ListingCardDetails] = {}
+
+        self._in_head = False
+        self._script_buffer: list[str] | None = None
+
+        self._card_id: int | None = None
+        self._card_div_depth = 0
+        self._card_bold_texts: list[str] = []
+        self._bold_depth = 0
+        self._bold_buffer: list[str] = []
+        self._header_div_depth: int | None = None
+        self._header_span_depth = 0
+        self._header_buffer: list[str] | None = None
+
+        self._pagination_div_depth = 0
+        self._page_link_buffer: list[str] | None = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+
+        if tag == "head":
+            self._in_head = True
+        elif tag == "script" and self._in_head and self.listings_str is None:
+            self._script_buffer = []
+
+        if self._pagination_div_depth:
+            if tag == "div":
+                self._pagination_div_depth += 1
+            elif (
+                tag == "a"
+                and "page-link" in (attributes.get("class") or "").split()
+            ):
+                self._page_link_buffer = []
+        elif tag == "div" and attributes.get("id") == "assets_list_pagination":
+            self._pagination_div_depth = 1
+            self.page_link_texts = []
+
+        if self._card_id is not None:
+            self._handle_card_starttag(tag, attributes)
+        else:
+            data_id = attributes.get("data-id")
+            if tag == "div" and data_id and data_id.isdigit():
+                self._card_id = int(data_id)
+                self._card_div_depth = 1
+                self._card_bold_texts = []
+                self._header_div_depth = None
+                self._header_buffer = None
+
+    def _handle_card_starttag(self, tag, attributes):
+        if tag == "div":
+            self._card_div_depth += 1
+            if (
+                self._header_div_depth is None
+                and "col-xs-11" in (attributes.get("class") or "").split()
+            ):
+                self._header_div_depth = self._card_div_depth
+        elif tag == "b":
+            if not self._bold_depth:
+                self._bold_buffer = []
+            self._bold_depth += 1
+        elif tag == "span" and self._header_div_depth is not None:
+            if self._header_span_depth:
+                self._header_span_depth += 1
+            elif (
+                self._header_buffer is None
+                and self._card_div_depth == self._header_div_depth
+            ):
+                self._header_span_depth = 1
+                self._header_buffer = []
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+        elif tag == "script" and self._script_buffer is not None:
+            script_content = "".join(self._script_buffer)
+            self._script_buffer = None
+            if _JSONLD_MARKER in script_content:
+                self.listings_str = _clean_jsonld_script(script_content)
+
+        if self._pagination_div_depth:
+            if tag == "a" and self._page_link_buffer is not None:
+                assert self.page_link_texts is not None
+                self.page_link_texts.append("".join(self._page_link_buffer))
+                self._page_link_buffer = None
+            elif tag == "div":
+                self._pagination_div_depth -= 1
+                if not self._pagination_div_depth:
+                    self.done = True
+
+        if self._card_id is not None:
+            self._handle_card_endtag(tag)
+
+    def _handle_card_endtag(self, tag):
+        if tag == "b" and self._bold_depth:
+            self._bold_depth -= 1
+            if not self._bold_depth:
+                self._card_bold_texts.append("".join(self._bold_buffer))
+        elif tag == "span" and self._header_span_depth:
+            self._header_span_depth -= 1
+        elif tag == "div":
+            if self._card_div_depth == self._header_div_depth:
+                self._header_div_depth = None
+            self._card_div_depth -= 1
+            if not self._card_div_depth:
+                assert self._card_id is not None
+                # Keep the first card in document order, like a lookup by id
+                if self._card_id not in self.card_index:
+                    header_text = (
+                        "".join(self._header_buffer)
+                        if self._header_buffer is not None
+                        else None
+                    )
+                    self.card_index[self._card_id] = _card_details_from_texts(
+                        bold_texts=self._card_bold_texts,
+                        header_text=header_text,
+                    )
+                self._card_id = None
+
+    def handle_data(self, data):
+        if self._script_buffer is not None:
+            self._script_buffer.append(data)
+        if self._page_link_buffer is not None:
+            self._page_link_buffer.append(data)
+        if self._bold_depth:
+            # Mirrors get_text(strip=True) on the <b> tag
+            self._bold_buffer.append(data.strip())
+        if self._header_span_depth:
+            assert self._header_buffer is not None
+            self._header_buffer.append(data)
+
+
+def _parse_page_fast(
+    html: str, chunk_size: int = 64 * 1024
+) -> ParsedPage | None:
+    tokenizer = _PageTokenizer()
+    for offset in range(0, len(html), chunk_size):
+        tokenizer.feed(html[offset : offset + chunk_size])
+        if tokenizer.done:
+            break
+
+    if tokenizer.listings_str is None or tokenizer.page_link_texts is None:
+        return None
+
+    return ParsedPage(
+        listings_str=tokenizer.listings_str,
+        last_page=_last_page_from_link_texts(tokenizer.page_link_texts),
+        card_index=tokenizer.card_index,
+    )
+
+
+def _parse_page_with_soup(html: str) -> ParsedPage:
+    html_soup = BeautifulSoup(html, "html.parser")
+    return ParsedPage(
+        listings_str=extract_listings(html_soup),
+        last_page=get_last_page_number(html_soup),
+        card_index=_build_listing_card_index(html_soup),
+    )
+
+
+def parse_page(html: str) -> ParsedPage:
+    parsed_page = _parse_page_fast(html)
+    if parsed_page is None:
+        logger.info("Fast page extraction incomplete, parsing full document")
+        parsed_page = _parse_page_with_soup(html)
+
+    return parsed_page
+
+
+def parse_results_page(
+    city: City,
+    page_number: int,
+    html: str,
+    fetched_at: datetime.datetime | None = None,
+) -> ParsedResultsPage:
+    parsed_page = parse_page(html)
+    listings_parsed = parse_listings_from_listings_str(parsed_page.listings_str)
+    listings_parsed_with_additions = _extract_and_add_square_meters(
+        card_index=parsed_page.card_index,
+        scraped_real_estate_listings=listings_parsed,
+    )
+
+    return ParsedResultsPage(
+        city=city,
+        page_number=page_number,
+        last_page=parsed_page.last_page,
+        listings=listings_parsed_with_additions,
+        fetched_at=fetched_at,
+    )
+
+
+@dataclass
+class ParseJob:
+    city: City
+    page_number: int
+    html: str
+    fetched_at: datetime.datetime
+    # Resolved once the page has been parsed
+    parsed: asyncio.Future[ParsedResultsPage]
+
+
 async def scrape_city(
-    browser: zd.Browser,
+    page_fetcher: PageFetcher,
     city: City,
     scraped_pages: list[int],
+    config: ScraperConfig,
+    parse_queue: asyncio.Queue[ParseJob],
+    fetch_stats: StageStats,
+    archive: PageArchive | None,
+    failed_cities: set[City],
     start_at_page: int = 0,
 ):
+    loop = asyncio.get_running_loop()
     current_page = start_at_page
+    if current_page - config.start_at_page >= config.max_pages_to_scrape:
+        logger.info(f"{city}: Reached max page scrape limit")
+        return
+
     while True:
-        url = get_wg_gesucht_url(city, current_page)
+        if city in failed_cities:
+            raise CityWriteError(f"{city}: Pages could not be saved")
+
+        url = get_wg_gesucht_url(city, current_page, config.base_url)
         logger.info(f"{city}: Scraping page {current_page} — {url}")
-        page = await browser.get(url)
-        await asyncio.sleep(5)
-        html = await page.get_content()
-
-        if "g-recaptcha" in html.lower():
-            logger.warning(f"{city}: CAPTCHA detected — waiting")
-            while "g-recaptcha" in html.lower():
-                await asyncio.sleep(5)
-                html = await page.get_content()
-            await asyncio.sleep(4)
-            html = await page.get_content()
-
-        html_soup = BeautifulSoup(html, "html.parser")
-        listings_str = extract_listings(html_soup)
-        listings_parsed = parse_listings_from_listings_str(listings_str)
-        listings_parsed_with_additions = _extract_and_add_square_meters(
-            html_soup=html_soup, scraped_real_estate_listings=listings_parsed
+        fetch_started_at = time.monotonic()
+        html = await page_fetcher.fetch(url)
+        fetch_finished_at = time.monotonic()
+        fetched_at = timezone.now()
+        fetch_stats.record(
+            n_pages=1,
+            n_listings=0,
+            busy_seconds=fetch_finished_at - fetch_started_at,
         )
-        last_page = get_last_page_number(html_soup)
 
-        await bulk_insert_listings(
-            scraped_real_estate_listings=listings_parsed_with_additions,
-            current_page=current_page,
-        )
-        logger.info(
-            f"{city}: Saved {len(listings_parsed)} listings from page {current_page}"
+        if archive is not None:
+            # zlib releases the GIL, so compressing in a thread is enough
+            sha256 = await asyncio.to_thread(archive.store, html)
+            archive.record(
+                ArchivedPage(
+                    city=city,
+                    page_number=current_page,
+                    fetched_at=fetched_at,
+                    sha256=sha256,
+                    run_id=config.run_id,
+                )
+            )
+
+        # Parsing overlaps with the politeness delay below, only the last
+        # page number is needed before fetching the next page
+        parsed_future: asyncio.Future[ParsedResultsPage] = loop.create_future()
+        await parse_queue.put(
+            ParseJob(
+                city=city,
+                page_number=current_page,
+                html=html,
+                fetched_at=fetched_at,
+                parsed=parsed_future,
+            )
         )
+        parsed_page = await parsed_future
+        last_page = parsed_page.last_page
 
         scraped_pages.append(current_page)
         current_page += 1
@@ -310,14 +847,189 @@ async def scrape_city(
             logger.info(f"{city}: Reached last page {last_page}")
             break
 
-        if len(scraped_pages) >= ScraperConfig().max_pages_to_scrape:
+        if (
+            config.incremental
+            and parsed_page.known_ratio() >= config.incremental_stop_ratio
+        ):
+            logger.info(
+                f"{city}: {parsed_page.known_ratio():.0%} of page"
+                f" {parsed_page.page_number} already known — stopping"
+            )
+            break
+
+        if current_page - config.start_at_page >= config.max_pages_to_scrape:
             logger.info(f"{city}: Reached max page scrape limit")
             break
 
-        await asyncio.sleep(1)
+        await asyncio.sleep(
+            max(
+                config.politeness_delay
+                - (time.monotonic() - fetch_finished_at),
+                0,
+            )
+        )
 
-    await browser.stop()
-    logger.info(f"✅ Finished scraping {city}")
+    logger.info(f"✅ Finished fetching {city}")
+
+
+async def parse_pages(
+    parse_queue: asyncio.Queue[ParseJob],
+    write_queue: asyncio.Queue[ParsedResultsPage | CityFinished],
+    executor: Executor,
+    parse_stats: StageStats,
+    seen_index: SeenListingIndex | None,
+) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        job = await parse_queue.get()
+        parse_started_at = time.monotonic()
+        try:
+            parsed_page = await loop.run_in_executor(
+                executor,
+                parse_results_page,
+                job.city,
+                job.page_number,
+                job.html,
+                job.fetched_at,
+            )
+
+            if seen_index is not None:
+                parsed_page.listing_statuses = [
+                    seen_index.classify(
+                        listing.listing_id, listing.content_hash()
+                    )
+                    for listing in parsed_page.listings
+                ]
+
+            parse_stats.record(
+                n_pages=1,
+                n_listings=len(parsed_page.listings),
+                busy_seconds=time.monotonic() - parse_started_at,
+            )
+            # Queue the page before its city moves on, so that each city's
+            # pages are written (and checkpointed) in order
+            await write_queue.put(parsed_page)
+            job.parsed.set_result(parsed_page)
+        # Any error, e.g. unexpected page content or a broken process pool,
+        # goes to the city's retry loop instead of stopping this worker
+        except Exception as e:
+            logger.exception(
+                f"{job.city}: Could not parse page {job.page_number}"
+            )
+            if not job.parsed.done():
+                job.parsed.set_exception(e)
+        finally:
+            parse_queue.task_done()
+
+
+async def _save_batch(
+    parsed_pages: list[ParsedResultsPage],
+    run_id: str,
+    finished_cities: list[City],
+    write_retries: int,
+) -> bool:
+    for attempt in range(1, write_retries + 1):
+        try:
+            await bulk_insert_listings(
+                parsed_pages=parsed_pages,
+                run_id=run_id,
+                finished_cities=finished_cities,
+            )
+        except Exception:
+            logger.exception(
+                f"Failed to save pages (attempt {attempt}/{write_retries}) "
+                + ", ".join(f"{p.city}/{p.page_number}" for p in parsed_pages)
+            )
+            if attempt < write_retries:
+                await asyncio.sleep(2**attempt)
+        else:
+            return True
+
+    return False
+
+
+async def write_pages(
+    write_queue: asyncio.Queue[ParsedResultsPage | CityFinished],
+    batch_size: int,
+    run_id: str,
+    write_retries: int,
+    write_stats: StageStats,
+    seen_index: SeenListingIndex | None,
+    failed_cities: set[City],
+) -> None:
+    """Save the queued pages and checkpoint them, in batches.
+
+    If a batch can't be saved, its cities fail: their later pages are
+    dropped instead of being checkpointed past the missing ones, and a
+    restart with the same run id fetches them again.
+    """
+    while True:
+        # Batch whatever pages are waiting, across cities
+        batch = [await write_queue.get()]
+        while not write_queue.empty() and (
+            sum(
+                len(item.listings)
+                for item in batch
+                if isinstance(item, ParsedResultsPage)
+            )
+            < batch_size
+        ):
+            batch.append(write_queue.get_nowait())
+
+        parsed_pages = [
+            item
+            for item in batch
+            if isinstance(item, ParsedResultsPage)
+            and item.city not in failed_cities
+        ]
+        finished_cities = [
+            item.city
+            for item in batch
+            if isinstance(item, CityFinished) and item.city not in failed_cities
+        ]
+        dropped_pages = [
+            item
+            for item in batch
+            if isinstance(item, ParsedResultsPage)
+            and item.city in failed_cities
+        ]
+        write_started_at = time.monotonic()
+        try:
+            if await _save_batch(
+                parsed_pages, run_id, finished_cities, write_retries
+            ):
+                write_stats.record(
+                    n_pages=len(parsed_pages),
+                    n_listings=sum(len(p.listings) for p in parsed_pages),
+                    busy_seconds=time.monotonic() - write_started_at,
+                )
+                for parsed_page in parsed_pages:
+                    logger.info(
+                        f"{parsed_page.city}: Saved"
+                        f" {len(parsed_page.listings_to_store())} of"
+                        f" {len(parsed_page.listings)} listings from page"
+                        f" {parsed_page.page_number}"
+                    )
+            else:
+                batch_cities = {p.city for p in parsed_pages}
+                for city in batch_cities.union(finished_cities):
+                    logger.error(
+                        f"❌ {city}: Giving up, restart with run id {run_id}"
+                        " to continue after its last saved page"
+                    )
+                    failed_cities.add(city)
+                dropped_pages.extend(parsed_pages)
+
+            # Their listings count as unseen again
+            if seen_index is not None:
+                for parsed_page in dropped_pages:
+                    for listing, status in zip(
+                        parsed_page.listings, parsed_page.listing_statuses
+                    ):
+                        seen_index.forget(listing.listing_id, status)
+        finally:
+            for _ in batch:
+                write_queue.task_done()
 
 
 async def main():
@@ -333,46 +1045,143 @@ async def main():
     )
 
     sem = asyncio.Semaphore(config.max_concurrent)
+    # One shared browser, each concurrently scraped city gets its own tab
+    # once it needs one
+    browser_pool = BrowserPool(
+        headless=config.headless, max_tabs=config.max_concurrent
+    )
+    http_fetcher = (
+        HttpFetcher(
+            max_connections=config.max_concurrent, timeout=config.http_timeout
+        )
+        if config.fetch_backend == "http"
+        else None
+    )
+
+    # Fetch -> parse (process pool) -> write (single writer), connected by
+    # bounded queues so that a slow stage holds back the ones before it
+    parse_queue: asyncio.Queue[ParseJob] = asyncio.Queue(
+        maxsize=config.parse_queue_size
+    )
+    write_queue: asyncio.Queue[ParsedResultsPage | CityFinished] = (
+        asyncio.Queue(maxsize=config.write_queue_size)
+    )
+    fetch_stats = StageStats("fetch")
+    parse_stats = StageStats("parse")
+    write_stats = StageStats("write")
+    stages = [fetch_stats, parse_stats, write_stats]
+    queues = {"parse": parse_queue, "write": write_queue}
+
+    seen_index = await load_seen_listing_index() if config.incremental else None
+    archive = PageArchive(config.archive_dir) if config.archive_dir else None
+    # Cities whose pages could not be saved
+    failed_cities: set[City] = set()
 
     async def with_limit(city: City):
+        checkpoint = await load_checkpoint(run_id=config.run_id, city=city)
+        if checkpoint and checkpoint.status == checkpoint.Status.FINISHED:
+            logger.info(f"Already finished in run {config.run_id}: {city=}")
+            return
+
+        # Pages parsed and queued for writing in this process
         scraped_pages: list[int] = []
         # Retry loop in case
         while True:
             try:
-                async with sem:
-                    max_scraped_page = max(scraped_pages, default=None)
-                    start_at_page = max_scraped_page or config.start_at_page
+                async with (
+                    sem,
+                    PageFetcher(
+                        browser_pool=browser_pool,
+                        http_fetcher=http_fetcher,
+                        page_ready_timeout=config.page_ready_timeout,
+                        page_ready_poll_interval=config.page_ready_poll_interval,
+                    ) as page_fetcher,
+                ):
+                    if scraped_pages:
+                        start_at_page = max(scraped_pages) + 1
+                    elif (
+                        checkpoint
+                        and checkpoint.last_committed_page is not None
+                    ):
+                        start_at_page = checkpoint.last_committed_page + 1
+                    else:
+                        start_at_page = config.start_at_page
                     logger.info(
                         f"Starting scraping for {city=} at page {start_at_page=}"
                     )
 
-                    browser = await zd.start(
-                        config=zd.Config(
-                            sandbox=True,
-                            headless=config.headless,
-                            browser_connection_timeout=2,
-                            browser_connection_max_tries=10,
-                        )
-                    )
-
                     await scrape_city(
                         city=city,
-                        browser=browser,
+                        page_fetcher=page_fetcher,
                         scraped_pages=scraped_pages,
-                        start_at_page=max_scraped_page or config.start_at_page,
+                        config=config,
+                        parse_queue=parse_queue,
+                        fetch_stats=fetch_stats,
+                        archive=archive,
+                        failed_cities=failed_cities,
+                        start_at_page=start_at_page,
                     )
+                await write_queue.put(CityFinished(city=city))
                 logger.info(f"Finished scraping: {city=}")
                 break
+            except CityWriteError as e:
+                logger.error(f"Stopped scraping: {e}")
+                break
             except Exception as e:
                 wait_n_seconds = 10
                 logger.error(f"Error for: {city=}: {e}")
                 logger.info(
                     f"Retrying after {wait_n_seconds} seconds for: {city=}"
                 )
-                await browser.stop()
                 await asyncio.sleep(wait_n_seconds)
 
-    await asyncio.gather(*(with_limit(city) for city in cities))
+    # Forking copies the locks of threads that are already running (asyncio's
+    # default executor, the HTTP session), so start workers from a server
+    executor = ProcessPoolExecutor(
+        max_workers=config.parse_processes,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+    with executor:
+        workers = [
+            asyncio.create_task(
+                parse_pages(
+                    parse_queue, write_queue, executor, parse_stats, seen_index
+                )
+            )
+            for _ in range(config.parse_processes)
+        ]
+        workers.append(
+            asyncio.create_task(
+                write_pages(
+                    write_queue,
+                    config.write_batch_size,
+                    config.run_id,
+                    config.write_retries,
+                    write_stats,
+                    seen_index,
+                    failed_cities,
+                )
+            )
+        )
+        workers.append(
+            asyncio.create_task(
+                report_pipeline_stats(stages, queues, config.stats_interval)
+            )
+        )
+
+        try:
+            await asyncio.gather(*(with_limit(city) for city in cities))
+            await parse_queue.join()
+            await write_queue.join()
+        finally:
+            await browser_pool.stop()
+            if http_fetcher is not None:
+                http_fetcher.close()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    log_pipeline_stats(stages, queues)
 
 
 if __name__ == "__main__":
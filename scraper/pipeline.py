@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.n_pages = 0
+        self.n_listings = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    def record(self, n_pages: int, n_listings: int, busy_seconds: float):
+        self.n_pages += n_pages
+        self.n_listings += n_listings
+        self.busy_seconds += busy_seconds
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return (
+            f"{self.name}: {self.n_pages} pages"
+            f" ({self.n_pages / elapsed:.2f}/s),"
+            f" {self.n_listings} listings ({self.n_listings / elapsed:.1f}/s),"
+            f" busy {self.busy_seconds / elapsed:.0%}"
+        )
+
+
+async def report_pipeline_stats(
+    stages: list[StageStats],
+    queues: dict[str, asyncio.Queue],
+    interval: float,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        log_pipeline_stats(stages, queues)
+
+
+def log_pipeline_stats(
+    stages: list[StageStats], queues: dict[str, asyncio.Queue]
+) -> None:
+    for stage in stages:
+        logger.info(stage.summary())
+    for queue_name, queue in queues.items():
+        logger.info(f"{queue_name} queue: {queue.qsize()}/{queue.maxsize}")
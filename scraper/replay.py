@@ -0,0 +1,154 @@
+import argparse
+import asyncio
+import datetime
+import logging
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import cast
+
+import django
+
+from .archive import ArchivedPage, PageArchive
+from .main import (
+    City,
+    ParsedResultsPage,
+    bulk_insert_listings,
+    parse_results_page,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _replay_page(
+    archive: PageArchive, archived_page: ArchivedPage
+) -> ParsedResultsPage:
+    return parse_results_page(
+        city=cast(City, archived_page.city),
+        page_number=archived_page.page_number,
+        html=archive.load(archived_page.sha256),
+        fetched_at=archived_page.fetched_at,
+    )
+
+
+async def replay(
+    archive: PageArchive,
+    archived_pages: list[ArchivedPage],
+    processes: int,
+    batch_size: int,
+) -> None:
+    """Parse the archived pages again and insert their listings.
+
+    The replayed snapshots carry the original fetch time. data_prepper keeps
+    the newest insert among snapshots of a url with the same time, so they
+    supersede the snapshots stored when the pages were first fetched.
+    """
+    loop = asyncio.get_running_loop()
+    n_saved_pages = 0
+    n_saved_listings = 0
+    batch: list[ParsedResultsPage] = []
+
+    # Only a few pages per process are read and parsed ahead of the writes
+    pages_to_submit = iter(archived_pages)
+    max_pending = 2 * processes
+    executor = ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+    with executor:
+        pending: set[asyncio.Future[ParsedResultsPage]] = set()
+        while True:
+            for page in islice(pages_to_submit, max_pending - len(pending)):
+                pending.add(
+                    loop.run_in_executor(executor, _replay_page, archive, page)
+                )
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                try:
+                    batch.append(future.result())
+                # Missing or truncated archive files, parse errors
+                except (
+                    OSError,
+                    EOFError,
+                    zlib.error,
+                    RuntimeError,
+                    ValueError,
+                ) as e:
+                    logger.error(f"Failed to parse archived page: {e}")
+
+            if sum(len(page.listings) for page in batch) >= batch_size:
+                await bulk_insert_listings(
+                    parsed_pages=batch, run_id=None, finished_cities=[]
+                )
+                n_saved_pages += len(batch)
+                n_saved_listings += sum(len(page.listings) for page in batch)
+                logger.info(
+                    f"Saved {n_saved_listings} listings from"
+                    f" {n_saved_pages}/{len(archived_pages)} pages"
+                )
+                batch = []
+
+    if batch:
+        await bulk_insert_listings(
+            parsed_pages=batch, run_id=None, finished_cities=[]
+        )
+        n_saved_pages += len(batch)
+        n_saved_listings += sum(len(page.listings) for page in batch)
+
+    logger.info(
+        f"✅ Replayed {n_saved_pages} pages with {n_saved_listings} listings"
+    )
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Parse archived results pages again and insert their listings,"
+            " stamped with the original fetch time"
+        )
+    )
+    parser.add_argument("archive_dir", type=Path)
+    parser.add_argument("--city", action="append", dest="cities")
+    parser.add_argument("--since", type=datetime.date.fromisoformat)
+    parser.add_argument("--until", type=datetime.date.fromisoformat)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wgwatch.settings")
+    django.setup()
+
+    archive = PageArchive(args.archive_dir)
+    archived_pages = [
+        archived_page
+        for archived_page in archive.entries()
+        if (not args.cities or archived_page.city in args.cities)
+        and (not args.since or archived_page.fetched_at.date() >= args.since)
+        and (not args.until or archived_page.fetched_at.date() <= args.until)
+    ]
+    logger.info(f"Replaying {len(archived_pages)} archived pages")
+
+    asyncio.run(
+        replay(
+            archive=archive,
+            archived_pages=archived_pages,
+            processes=args.processes,
+            batch_size=args.batch_size,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
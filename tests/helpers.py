@@ -0,0 +1,78 @@
+import io
+import multiprocessing
+import os
+import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Any
+
+import django
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from data_prepper.main import refresh
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_PAGE = BASE_DIR / "data" / "wg_gesucht.html"
+
+
+def refresh_tables(full: bool = False) -> None:
+    """Like data_prepper.main, without its output."""
+    with (
+        transaction.atomic(),
+        connection.cursor() as cursor,
+        redirect_stdout(io.StringIO()),
+    ):
+        refresh(cursor, full=full)
+
+
+class RefreshedTablesTestCase(TransactionTestCase):
+    """Freshly built data_prepper tables and empty caches for each test.
+
+    The async views and the export query on the connections of their own
+    threads, which only see committed data, so no TestCase.
+    """
+
+    def setUp(self):
+        super().setUp()
+        refresh_tables(full=True)
+        for cache in caches.all():
+            cache.clear()
+
+
+def _init_scratch_worker(db_path: str, profile: str) -> None:
+    os.environ["DB_PATH"] = db_path
+    os.environ["DB_PROFILE"] = profile
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wgwatch.settings")
+    django.setup()
+
+
+def migrate_scratch_db() -> None:
+    """Run in a scratch worker before seeding it."""
+    call_command("migrate", verbosity=0)
+    refresh_tables(full=True)
+
+
+@contextmanager
+def scratch_db_executor(
+    max_workers: int, profile: str, **kwargs: Any
+) -> Iterator[ProcessPoolExecutor]:
+    """Worker processes sharing a database file of their own.
+
+    Spawned, so no worker inherits a connection of another, or the test
+    database's settings.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_scratch_worker,
+            initargs=(str(Path(tmp_dir) / "db.sqlite3"), profile),
+            **kwargs,
+        )
+        with executor:
+            yield executor
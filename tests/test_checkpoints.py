@@ -0,0 +1,122 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import OperationalError
+from django.test import TestCase
+
+from scraper.incremental import SeenListingIndex
+from scraper.main import (
+    City,
+    CityFinished,
+    ParsedResultsPage,
+    bulk_insert_listings,
+    parse_results_page,
+    write_pages,
+)
+from scraper.pipeline import StageStats
+from tests.helpers import RESULTS_PAGE
+from wgwatch.models import RealEstateListing, ScrapeCheckpoint
+
+
+async def _fail_on_koeln_page_1(parsed_pages, run_id, finished_cities):
+    if any(
+        page.city == "Koeln" and page.page_number == 1 for page in parsed_pages
+    ):
+        raise OperationalError("disk I/O error")
+    await bulk_insert_listings(
+        parsed_pages=parsed_pages,
+        run_id=run_id,
+        finished_cities=finished_cities,
+    )
+
+
+class FailedWriteTest(TestCase):
+    html: str
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.html = RESULTS_PAGE.read_text()
+
+    def _page(self, city: City, page_number: int) -> ParsedResultsPage:
+        return parse_results_page(city, page_number, self.html)
+
+    @async_to_sync
+    async def _write(
+        self,
+        items: list[ParsedResultsPage | CityFinished],
+        failed_cities: set[City],
+        seen_index: SeenListingIndex | None = None,
+    ) -> None:
+        write_queue: asyncio.Queue[ParsedResultsPage | CityFinished] = (
+            asyncio.Queue()
+        )
+        for item in items:
+            write_queue.put_nowait(item)
+        writer = asyncio.create_task(
+            write_pages(
+                write_queue,
+                batch_size=1,
+                run_id="run",
+                write_retries=1,
+                write_stats=StageStats("write"),
+                seen_index=seen_index,
+                failed_cities=failed_cities,
+            )
+        )
+        await write_queue.join()
+        writer.cancel()
+
+    def test_failed_page_stops_its_city_checkpoint(self):
+        failed_cities: set[City] = set()
+        with (
+            mock.patch(
+                "scraper.main.bulk_insert_listings", _fail_on_koeln_page_1
+            ),
+            self.assertLogs("scraper.main", "ERROR"),
+        ):
+            self._write(
+                [
+                    self._page("Koeln", 0),
+                    self._page("Koeln", 1),
+                    self._page("Koeln", 2),
+                    CityFinished(city="Koeln"),
+                    self._page("Berlin", 0),
+                    CityFinished(city="Berlin"),
+                ],
+                failed_cities,
+            )
+
+        self.assertEqual(failed_cities, {"Koeln"})
+        koeln = ScrapeCheckpoint.objects.get(run_id="run", city="Koeln")
+        self.assertEqual(koeln.last_committed_page, 0)
+        self.assertEqual(koeln.status, ScrapeCheckpoint.Status.RUNNING)
+        berlin = ScrapeCheckpoint.objects.get(run_id="run", city="Berlin")
+        self.assertEqual(berlin.last_committed_page, 0)
+        self.assertEqual(berlin.status, ScrapeCheckpoint.Status.FINISHED)
+        self.assertEqual(RealEstateListing.objects.count(), 40)
+
+    def test_unsaved_listings_are_not_seen(self):
+        seen_index = SeenListingIndex({})
+        page = self._page("Koeln", 1)
+        page.listing_statuses = [
+            seen_index.classify(listing.listing_id, listing.content_hash())
+            for listing in page.listings
+        ]
+        with (
+            mock.patch(
+                "scraper.main.bulk_insert_listings", _fail_on_koeln_page_1
+            ),
+            self.assertLogs("scraper.main", "ERROR"),
+        ):
+            self._write([page], set(), seen_index)
+
+        self.assertEqual(len(seen_index), 0)
+        self.assertEqual(
+            {
+                seen_index.classify(listing.listing_id, listing.content_hash())
+                for listing in page.listings
+            },
+            {"new"},
+        )
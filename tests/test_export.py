@@ -0,0 +1,78 @@
+import csv
+import gzip
+import io
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import SimpleTestCase
+
+from benchmark.export_memory import run_exports
+from data_prepper.main import LATEST_LISTING_TABLE
+from tests.helpers import RefreshedTablesTestCase
+from wgwatch.export import EXPORT_CHUNK_ROWS, _export_executor, aiter_export
+from wgwatch.types import ExportFilter
+
+# Far more than the rows of a chunk, the whole export would take about
+# 25 MB as CSV and many times that as Python objects
+_N_ROWS = 200_000
+_MAX_RSS_GROWTH_MB = 16
+
+
+class ExportMemoryTest(SimpleTestCase):
+    def test_peak_rss_stays_flat(self):
+        for result in run_exports(_N_ROWS, "default", ["csv"]):
+            with self.subTest(path=result.path, compress=result.compress):
+                self.assertGreater(result.n_bytes, 0)
+                self.assertLessEqual(
+                    result.peak_rss_growth_mb, _MAX_RSS_GROWTH_MB
+                )
+
+
+class ExportEndpointTest(RefreshedTablesTestCase):
+    def setUp(self):
+        super().setUp()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {LATEST_LISTING_TABLE} (
+                    id, url, address_locality, offer_type, price,
+                    job_insert_time, scrape_date, rn
+                )
+                VALUES (
+                    %s, %s, 'Berlin', 'Room', 500,
+                    '2025-01-01 12:00:00', '2025-01-01', 1
+                )
+                """,
+                [
+                    (i, f"https://www.wg-gesucht.de/{i}.html")
+                    for i in range(3 * EXPORT_CHUNK_ROWS)
+                ],
+            )
+
+    async def test_gzipped_csv(self):
+        response = await self.async_client.get(
+            "/api/export",
+            {"citySelection": "Berlin"},
+            headers={"Accept-Encoding": "gzip"},
+            secure=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        content = gzip.decompress(
+            b"".join([chunk async for chunk in response.streaming_content])
+        )
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 3 * EXPORT_CHUNK_ROWS)
+
+    def test_abandoned_export_frees_its_thread(self):
+        @async_to_sync
+        async def read_first_chunk() -> None:
+            chunks = aiter_export(ExportFilter(), "csv", compress=False)
+            await anext(chunks)
+            await chunks.aclose()
+
+        # More than the pool has threads, each must give its thread back
+        for _ in range(_export_executor._max_workers + 1):
+            read_first_chunk()
@@ -0,0 +1,144 @@
+import datetime
+import shutil
+import tempfile
+import threading
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from scraper.browser import BrowserPool
+from scraper.fetch import HttpFetcher, PageFetcher
+from scraper.main import build_django_listings, parse_results_page
+from tests.helpers import BASE_DIR, RESULTS_PAGE
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _CountingBrowserPool(BrowserPool):
+    """Hands out a fake tab, the browser's page is patched in the tests."""
+
+    def __init__(self) -> None:
+        super().__init__(headless=True, max_tabs=1)
+        self.n_checkouts = 0
+
+    @asynccontextmanager
+    async def tab(self) -> AsyncIterator[mock.AsyncMock]:
+        self.n_checkouts += 1
+        yield mock.AsyncMock()
+
+
+class HttpFetcherTest(SimpleTestCase):
+    """Against a local stand-in for the site, which, like http.server,
+    sends text/html without a charset."""
+
+    pages_dir: str
+    server: ThreadingHTTPServer
+    base_url: str
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pages_dir = tempfile.mkdtemp()
+        pages_dir = Path(cls.pages_dir)
+        shutil.copy(RESULTS_PAGE, pages_dir / "results.html")
+        shutil.copy(BASE_DIR / "listings.html", pages_dir / "listings.html")
+        (pages_dir / "captcha.html").write_text(
+            RESULTS_PAGE.read_text().replace(
+                "</body>", '<div class="g-recaptcha"></div></body>'
+            )
+        )
+        cls.server = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            partial(_QuietHandler, directory=cls.pages_dir),
+        )
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.pages_dir)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.http_fetcher = HttpFetcher(max_connections=2, timeout=5)
+        self.addCleanup(self.http_fetcher.close)
+
+    def _fetch(self, name: str) -> str | None:
+        return async_to_sync(self.http_fetcher.fetch)(f"{self.base_url}/{name}")
+
+    def test_parses_like_the_file(self):
+        html = self._fetch("results.html")
+        assert html is not None
+        fetched_at = datetime.datetime(2025, 8, 1, tzinfo=datetime.UTC)
+
+        fetched = parse_results_page("Koeln", 0, html, fetched_at)
+        direct = parse_results_page(
+            "Koeln", 0, RESULTS_PAGE.read_text(), fetched_at
+        )
+
+        self.assertEqual(fetched, direct)
+        self.assertEqual(
+            [listing.square_meters for listing in fetched.listings[:3]],
+            [32, 18, 25],
+        )
+        # As stored, which the app filters by city
+        self.assertEqual(
+            {
+                listing.address_locality
+                for listing in build_django_listings(fetched.listings, 0)
+            },
+            {"Köln"},
+        )
+
+    def test_pages_that_need_a_browser(self):
+        for name in ["listings.html", "captcha.html", "missing.html"]:
+            with (
+                self.subTest(name=name),
+                self.assertLogs("scraper.fetch", "WARNING"),
+            ):
+                self.assertIsNone(self._fetch(name))
+
+    @async_to_sync
+    async def _fetch_pages(
+        self, browser_pool: BrowserPool, names: list[str]
+    ) -> list[str]:
+        async with PageFetcher(
+            browser_pool=browser_pool,
+            http_fetcher=self.http_fetcher,
+            page_ready_timeout=1,
+            page_ready_poll_interval=0.1,
+        ) as page_fetcher:
+            return [
+                await page_fetcher.fetch(f"{self.base_url}/{name}")
+                for name in names
+            ]
+
+    def test_tab_only_on_fallback(self):
+        browser_pool = _CountingBrowserPool()
+        with mock.patch(
+            "scraper.fetch.wait_for_results_page", return_value="from browser"
+        ):
+            pages = self._fetch_pages(browser_pool, ["results.html"] * 2)
+            self.assertEqual(browser_pool.n_checkouts, 0)
+            self.assertNotIn("from browser", pages)
+
+            with self.assertLogs("scraper.fetch", "WARNING"):
+                pages = self._fetch_pages(
+                    browser_pool,
+                    ["results.html", "captcha.html", "missing.html"],
+                )
+
+        self.assertEqual(pages[1:], ["from browser", "from browser"])
+        # Kept for the rest of the city's pages
+        self.assertEqual(browser_pool.n_checkouts, 1)
@@ -0,0 +1,34 @@
+from tests.helpers import RefreshedTablesTestCase
+
+
+class HomeTest(RefreshedTablesTestCase):
+    def _get(self, params: dict[str, str | list[str]]):
+        return self.client.get("/", params, secure=True)
+
+    def test_explicit_date_range(self):
+        response = self._get(
+            {
+                "citiesSelection": ["Berlin", "Köln"],
+                "dateFrom": "2025-01-01",
+                "dateTo": "2025-06-30",
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["bucket"], "week")
+        self.assertEqual(response.context["city_comparison_data"], [])
+
+    def test_default_date_range(self):
+        response = self._get({"citiesSelection": ["Berlin"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["bucket"], "day")
+
+    def test_invalid_date_range(self):
+        for params in [
+            {"dateFrom": "2025-06-30", "dateTo": "2025-01-01"},
+            {"dateFrom": "2025-13-01", "dateTo": "2025-06-30"},
+            {"dateTo": "yesterday"},
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self._get(params).status_code, 400)
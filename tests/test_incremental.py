@@ -0,0 +1,52 @@
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TestCase
+
+from data_prepper.main import LATEST_LISTING_TABLE
+from scraper.incremental import load_seen_listing_index
+from scraper.main import bulk_insert_listings, parse_results_page
+from tests.helpers import RESULTS_PAGE, refresh_tables
+from wgwatch.models import ListingSighting, RealEstateListing
+
+
+class IncrementalScrapeTest(TestCase):
+    def _scrape(self, fetched_at: datetime.datetime) -> None:
+        seen_index = async_to_sync(load_seen_listing_index)()
+        parsed_page = parse_results_page(
+            "Koeln", 0, RESULTS_PAGE.read_text(), fetched_at=fetched_at
+        )
+        parsed_page.listing_statuses = [
+            seen_index.classify(listing.listing_id, listing.content_hash())
+            for listing in parsed_page.listings
+        ]
+        async_to_sync(bulk_insert_listings)(
+            parsed_pages=[parsed_page], run_id=None, finished_cities=[]
+        )
+
+    def test_unchanged_listings_count_on_every_day(self):
+        day_1 = datetime.datetime(2025, 8, 1, 8, tzinfo=datetime.UTC)
+        day_2 = day_1 + datetime.timedelta(days=1)
+        self._scrape(day_1)
+        self._scrape(day_2)
+
+        # Stored once, seen again the next day
+        self.assertEqual(RealEstateListing.objects.count(), 20)
+        self.assertEqual(ListingSighting.objects.count(), 20)
+
+        refresh_tables(full=True)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT scrape_date, COUNT(*), MAX(job_insert_time)
+                FROM {LATEST_LISTING_TABLE}
+                GROUP BY scrape_date
+                ORDER BY scrape_date
+            """)
+            rows = cursor.fetchall()
+
+        self.assertEqual(
+            [(scrape_date, n_listings) for scrape_date, n_listings, _ in rows],
+            [("2025-08-01", 20), ("2025-08-02", 20)],
+        )
+        self.assertTrue(rows[1][2].startswith("2025-08-02 08:00"))
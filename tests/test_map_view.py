@@ -0,0 +1,93 @@
+from django.test import SimpleTestCase
+
+from tests.helpers import RefreshedTablesTestCase
+from wgwatch.grid import build_map_view, snap_to_tiles
+from wgwatch.types import BoundingBox, ListingLocationColumns, MapViewport
+
+# Around Cologne's old town
+_BBOX = BoundingBox(west=6.93, south=50.93, east=6.97, north=50.95)
+_PANNED_BBOX = BoundingBox(west=6.931, south=50.931, east=6.971, north=50.951)
+
+
+class MapViewTest(SimpleTestCase):
+    def test_small_pans_share_the_tiles(self):
+        viewport = snap_to_tiles(MapViewport(zoom=12, bbox=_BBOX))
+        panned = snap_to_tiles(MapViewport(zoom=12, bbox=_PANNED_BBOX))
+
+        self.assertEqual(viewport, panned)
+        self.assertLessEqual(viewport.bbox.west, _BBOX.west)
+        self.assertLessEqual(viewport.bbox.south, _BBOX.south)
+        self.assertGreaterEqual(viewport.bbox.east, _PANNED_BBOX.east)
+        self.assertGreaterEqual(viewport.bbox.north, _PANNED_BBOX.north)
+
+    def test_cells_skip_missing_prices(self):
+        listings = ListingLocationColumns(
+            latitude=[50.94, 50.94, 50.94],
+            longitude=[6.95, 6.95, 6.95],
+            price=[500, None, 700],
+            square_meters=[20, 30, None],
+            price_rank_normalized=[0.0, None, 1.0],
+            name=["a", "b", "c"],
+            url=[None, None, None],
+        )
+
+        map_view = build_map_view(listings, MapViewport(zoom=12, bbox=_BBOX))
+
+        assert map_view.cells is not None
+        self.assertEqual(map_view.cells.n_listings, [3])
+        self.assertEqual(map_view.cells.price_median, [600])
+        self.assertEqual(map_view.cells.price_per_square_meter_mean, [25])
+        self.assertEqual(map_view.cells.price_rank_normalized, [0.5])
+
+
+class MapViewEndpointTest(RefreshedTablesTestCase):
+    def _get(self, bbox: BoundingBox, headers: dict[str, str] | None = None):
+        return self.client.get(
+            "/api/map/view",
+            {
+                "citySelection": "Köln",
+                "offerSelection": "Room",
+                "zoom": "12",
+                "bbox": f"{bbox.west},{bbox.south},{bbox.east},{bbox.north}",
+            },
+            headers=headers,
+            secure=True,
+        )
+
+    def test_small_pans_share_the_etag(self):
+        response = self._get(_BBOX)
+        panned = self._get(_PANNED_BBOX)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], panned["ETag"])
+        self.assertEqual(response.content, panned.content)
+
+    def test_etag_per_encoding(self):
+        identity = self._get(_BBOX)
+        gzipped = self._get(_BBOX, {"Accept-Encoding": "gzip"})
+
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertNotEqual(identity["ETag"], gzipped["ETag"])
+
+    def test_not_modified_keeps_the_headers(self):
+        etag = self._get(_BBOX)["ETag"]
+        response = self._get(_BBOX, {"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+    def test_invalid_bbox(self):
+        response = self.client.get(
+            "/api/map/view",
+            {
+                "citySelection": "Köln",
+                "offerSelection": "Room",
+                "zoom": "12",
+                "bbox": "6.93,50.93",
+            },
+            secure=True,
+        )
+
+        self.assertEqual(response.status_code, 400)
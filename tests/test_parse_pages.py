@@ -0,0 +1,77 @@
+import asyncio
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from scraper.main import (
+    CityFinished,
+    ParsedResultsPage,
+    ParseJob,
+    parse_pages,
+    parse_results_page,
+)
+from scraper.pipeline import StageStats
+from tests.helpers import RESULTS_PAGE
+
+
+def _fail_on_page_1(city, page_number, html, fetched_at):
+    if page_number == 1:
+        raise AttributeError("unexpected page content")
+    return parse_results_page(city, page_number, html, fetched_at)
+
+
+class ParsePagesTest(SimpleTestCase):
+    @async_to_sync
+    async def _parse(
+        self, page_numbers: list[int]
+    ) -> list[asyncio.Future[ParsedResultsPage]]:
+        loop = asyncio.get_running_loop()
+        parse_queue: asyncio.Queue[ParseJob] = asyncio.Queue()
+        write_queue: asyncio.Queue[ParsedResultsPage | CityFinished] = (
+            asyncio.Queue()
+        )
+        html = RESULTS_PAGE.read_text()
+        futures: list[asyncio.Future[ParsedResultsPage]] = []
+        for page_number in page_numbers:
+            future: asyncio.Future[ParsedResultsPage] = loop.create_future()
+            futures.append(future)
+            parse_queue.put_nowait(
+                ParseJob(
+                    city="Koeln",
+                    page_number=page_number,
+                    html=html,
+                    fetched_at=datetime.datetime.now(datetime.UTC),
+                    parsed=future,
+                )
+            )
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            worker = asyncio.create_task(
+                parse_pages(
+                    parse_queue,
+                    write_queue,
+                    executor,
+                    StageStats("parse"),
+                    seen_index=None,
+                )
+            )
+            await asyncio.wait_for(parse_queue.join(), timeout=10)
+            self.assertFalse(worker.done())
+            worker.cancel()
+
+        return futures
+
+    def test_unexpected_error_reaches_the_city(self):
+        with (
+            mock.patch("scraper.main.parse_results_page", _fail_on_page_1),
+            self.assertLogs("scraper.main", "ERROR"),
+        ):
+            futures = self._parse([0, 1, 2])
+
+        self.assertIsInstance(futures[1].exception(), AttributeError)
+        # The worker goes on with the next pages
+        self.assertEqual(futures[0].result().page_number, 0)
+        self.assertEqual(futures[2].result().page_number, 2)
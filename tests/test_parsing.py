@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase
+
+from scraper.main import (
+    _parse_page_fast,
+    _parse_page_with_soup,
+    parse_listings_from_listings_str,
+    parse_results_page,
+)
+from tests.helpers import RESULTS_PAGE
+
+# listing id: (name prefix, price, square meters) of a few cards
+EXPECTED_LISTINGS = {
+    11317682: ("Appartement zu vermieten, ab sofort!", 1200.0, 32),
+    5579974: ("50858/ 15 min.UNI/ CITY/ Frauen-WG", 620.0, 18),
+    9147775: ("Wunderschöne Maisonette Wohnung", 1794.0, 89),
+    12123832: ("WG-konzipiertes Einfamilienhaus", 2350.0, 175),
+    12183642: ("1 Zimmer Wohnung in Vingst", 700.0, 28),
+}
+
+
+class ResultsPageParsingTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.html = RESULTS_PAGE.read_text()
+
+    def test_fast_path_matches_soup_path(self):
+        fast = _parse_page_fast(self.html)
+        assert fast is not None
+        soup = _parse_page_with_soup(self.html)
+
+        self.assertEqual(list(fast.card_index), list(soup.card_index))
+        self.assertEqual(fast.card_index, soup.card_index)
+        self.assertEqual(fast.last_page, soup.last_page)
+        self.assertEqual(
+            parse_listings_from_listings_str(fast.listings_str),
+            parse_listings_from_listings_str(soup.listings_str),
+        )
+
+    def test_card_index(self):
+        fast = _parse_page_fast(self.html)
+        assert fast is not None
+
+        self.assertEqual(len(fast.card_index), 20)
+        self.assertEqual(fast.last_page, 82)
+        for listing_id, (_, _, square_meters) in EXPECTED_LISTINGS.items():
+            self.assertEqual(
+                fast.card_index[listing_id].square_meters, square_meters
+            )
+        self.assertEqual(fast.card_index[9147775].rooms, 2.5)
+
+    def test_listings(self):
+        parsed_page = parse_results_page("Koeln", 0, self.html)
+
+        self.assertEqual(len(parsed_page.listings), 20)
+        listings = {
+            listing.listing_id: listing for listing in parsed_page.listings
+        }
+        for listing_id, expected in EXPECTED_LISTINGS.items():
+            name, price, square_meters = expected
+            listing = listings[listing_id]
+            assert listing.listings_scraped.name is not None
+            self.assertTrue(listing.listings_scraped.name.startswith(name))
+            self.assertEqual(listing.listings_scraped.offers.price, price)
+            self.assertEqual(listing.square_meters, square_meters)
@@ -0,0 +1,143 @@
+import datetime
+import json
+from typing import Any
+
+from django.db import connection
+from django.test import TestCase
+
+from data_prepper.main import (
+    LISTING_TABLE,
+    QUERY_DAILY_CITY_OFFER_PERCENTILES,
+    QUERY_DAILY_CITY_OFFER_ROLLUP,
+    QUERY_LISTING_CATALOG,
+    latest_listing_query,
+)
+from geocode.main import QUERY_SELECT_ADDRESSES
+from tests.helpers import refresh_tables
+from wgwatch.queries import queries
+
+# The window and join queries plan subqueries and CTEs as co-routines, which
+# are scanned by name, as are table-valued functions like json_each. Only a
+# scan of a real table without an index is a full-table scan.
+_CO_ROUTINE_PREFIXES = ("CO-ROUTINE ", "MATERIALIZE ")
+
+
+def _hot_queries() -> dict[str, tuple[str, Any, set[str]]]:
+    """Query name -> (sql, params, tables or aliases allowed to be scanned)"""
+    scrape_dates = json.dumps([datetime.date.today().isoformat()])
+    with connection.cursor() as cursor:
+        listing_columns = [
+            column.name
+            for column in connection.introspection.get_table_description(
+                cursor, LISTING_TABLE
+            )
+        ]
+
+    return {
+        "data_prepper.latest_listing_per_day": (
+            latest_listing_query(listing_columns),
+            [scrape_dates],
+            set(),
+        ),
+        "data_prepper.daily_city_offer_rollup": (
+            QUERY_DAILY_CITY_OFFER_ROLLUP,
+            [scrape_dates],
+            set(),
+        ),
+        "data_prepper.daily_city_offer_percentiles": (
+            QUERY_DAILY_CITY_OFFER_PERCENTILES,
+            [scrape_dates],
+            set(),
+        ),
+        "data_prepper.listing_catalog": (
+            QUERY_LISTING_CATALOG,
+            [scrape_dates],
+            set(),
+        ),
+        # Every address has to be checked for a location, but the far
+        # larger listings table must not be touched
+        "geocode.select_addresses": (
+            QUERY_SELECT_ADDRESSES,
+            [],
+            {"addresses"},
+        ),
+        "queries.data_version": (queries["data_version"].sql(), {}, set()),
+        # Read whole, but only when the data version changed
+        "queries.catalog": (queries["catalog"].sql(), {}, {"listing_catalog"}),
+        "queries.city_comparison": (
+            queries["city_comparison"].sql(n_cities=2, bucket="week"),
+            {
+                "city_1": "Berlin",
+                "city_2": "Köln",
+                "date_from": "2025-01-01",
+                "date_to": "2025-12-31",
+            },
+            set(),
+        ),
+        "queries.export_listings": (
+            queries["export_listings"].sql(by_city=True, by_offer_type=True),
+            {
+                "city": "Berlin",
+                "offer_type": "Room",
+                "date_from": "2025-01-01",
+                "date_to": "2025-12-31",
+            },
+            set(),
+        ),
+        "queries.listings_with_locations": (
+            queries["listings_with_locations"].sql(),
+            {"city": "Berlin", "offer_type": "Room"},
+            set(),
+        ),
+    }
+
+
+def explain(sql: str, params: Any) -> list[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}", params)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def find_full_scans(plan: list[str], allowed: set[str]) -> list[str]:
+    co_routines = {
+        detail.removeprefix(prefix)
+        for detail in plan
+        for prefix in _CO_ROUTINE_PREFIXES
+        if detail.startswith(prefix)
+    }
+
+    full_scans = []
+    for detail in plan:
+        if (
+            not detail.startswith("SCAN ")
+            or " USING " in detail
+            or " VIRTUAL TABLE " in detail
+        ):
+            continue
+        scanned = detail.removeprefix("SCAN ").split(" ")[0]
+        if (
+            scanned not in co_routines
+            and scanned not in allowed
+            and not scanned.startswith("(")
+        ):
+            full_scans.append(detail)
+
+    return full_scans
+
+
+class QueryPlanTest(TestCase):
+    """The hot queries of the app, data_prepper and geocode are backed by
+    indexes and never fall back to a full-table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Creates latest_realestatelisting_per_day and the tables built on it
+        refresh_tables(full=True)
+
+    def test_no_full_table_scans(self):
+        for name, (sql, params, allowed) in _hot_queries().items():
+            with self.subTest(name):
+                plan = explain(sql, params)
+                self.assertEqual(
+                    find_full_scans(plan, allowed), [], "\n".join(plan)
+                )
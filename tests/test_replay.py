@@ -0,0 +1,54 @@
+import datetime
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TestCase
+
+from data_prepper.main import LATEST_LISTING_TABLE
+from scraper.archive import ArchivedPage, PageArchive
+from scraper.main import bulk_insert_listings, parse_results_page
+from scraper.replay import replay
+from tests.helpers import RESULTS_PAGE, refresh_tables
+from wgwatch.models import RealEstateListing
+
+
+class ReplayTest(TestCase):
+    def test_replayed_snapshots_supersede_the_originals(self):
+        html = RESULTS_PAGE.read_text()
+        fetched_at = datetime.datetime(2025, 8, 1, 8, tzinfo=datetime.UTC)
+        async_to_sync(bulk_insert_listings)(
+            parsed_pages=[
+                parse_results_page("Koeln", 0, html, fetched_at=fetched_at)
+            ],
+            run_id=None,
+            finished_cities=[],
+        )
+        original_ids = set(
+            RealEstateListing.objects.values_list("id", flat=True)
+        )
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            archive = PageArchive(Path(archive_dir))
+            archived_page = ArchivedPage(
+                city="Koeln",
+                page_number=0,
+                fetched_at=fetched_at,
+                sha256=archive.store(html),
+            )
+            async_to_sync(replay)(
+                archive=archive,
+                archived_pages=[archived_page],
+                processes=1,
+                batch_size=100,
+            )
+
+        self.assertEqual(RealEstateListing.objects.count(), 40)
+        refresh_tables(full=True)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {LATEST_LISTING_TABLE}")
+            latest_ids = {row[0] for row in cursor.fetchall()}
+
+        self.assertEqual(len(latest_ids), 20)
+        self.assertFalse(latest_ids & original_ids)
@@ -0,0 +1,210 @@
+import datetime
+import math
+import random
+import sys
+import time
+import uuid
+
+from django.test import SimpleTestCase
+from pydantic import BaseModel
+
+from tests.helpers import (
+    migrate_scratch_db,
+    refresh_tables,
+    scratch_db_executor,
+)
+from wgwatch.types import City, OfferType, SelectedCities
+
+_CITIES: list[City] = ["Berlin", "Hamburg", "Köln", "München"]
+_OFFER_TYPES: list[OfferType] = ["Room", "Apartment", "Suite"]
+
+_N_WRITERS = 4
+_N_READERS = 4
+_DURATION_S = 3.0
+# Readers never wait for the writers in WAL mode, only for the CPU
+_MAX_READER_P99_S = 2.0
+
+
+class WorkerResult(BaseModel):
+    latencies_s: list[float]
+    n_lock_errors: int
+
+
+class RoleResult(BaseModel):
+    role: str
+    n_workers: int
+    n_operations: int
+    n_lock_errors: int
+    latency_p50_s: float
+    latency_p99_s: float
+
+    @classmethod
+    def summarize(
+        cls, role: str, worker_results: list[WorkerResult]
+    ) -> "RoleResult":
+        latencies_s = sorted(
+            latency_s
+            for worker_result in worker_results
+            for latency_s in worker_result.latencies_s
+        )
+
+        def percentile(q: float) -> float:
+            # Nearest rank
+            if not latencies_s:
+                return math.nan
+            return latencies_s[
+                min(int(len(latencies_s) * q), len(latencies_s) - 1)
+            ]
+
+        return cls(
+            role=role,
+            n_workers=len(worker_results),
+            n_operations=len(latencies_s),
+            n_lock_errors=sum(
+                worker_result.n_lock_errors for worker_result in worker_results
+            ),
+            latency_p50_s=percentile(0.5),
+            latency_p99_s=percentile(0.99),
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.role:<12} {self.n_workers:>2} workers"
+            f" {self.n_operations:>5} ops {self.n_lock_errors:>3} lock errors"
+            f" p50 {self.latency_p50_s * 1000:8.1f} ms"
+            f" p99 {self.latency_p99_s * 1000:8.1f} ms"
+        )
+
+
+def _migrate_and_seed(n_listings: int) -> None:
+    from wgwatch.models import RealEstateListing
+
+    migrate_scratch_db()
+    RealEstateListing.objects.bulk_create(
+        _build_listings(n_listings), batch_size=500
+    )
+    refresh_tables()
+
+
+def _build_listings(n_listings: int) -> list:
+    from wgwatch.models import RealEstateListing
+
+    now = datetime.datetime.now(datetime.UTC)
+    return [
+        RealEstateListing(
+            url=f"https://www.wg-gesucht.de/{uuid.uuid4().int % 10**8}.html",
+            name="Concurrency test listing",
+            address_locality=random.choice(_CITIES),
+            offer_type=random.choice(_OFFER_TYPES),
+            price=random.randint(300, 2000),
+            square_meters=random.randint(10, 120),
+            job_insert_time=now,
+            scrape_date=now.date(),
+        )
+        for _ in range(n_listings)
+    ]
+
+
+def _is_lock_error(e: Exception) -> bool:
+    return "locked" in str(e) or "busy" in str(e)
+
+
+def _run_until(deadline: float, operation) -> WorkerResult:
+    from django.db import OperationalError
+
+    latencies_s = []
+    n_lock_errors = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            operation()
+        except OperationalError as e:
+            if not _is_lock_error(e):
+                raise
+            n_lock_errors += 1
+            continue
+        latencies_s.append(time.perf_counter() - start)
+
+    return WorkerResult(latencies_s=latencies_s, n_lock_errors=n_lock_errors)
+
+
+def _write(duration_s: float, batch_size: int) -> WorkerResult:
+    """Commit batches of listings like bulk_insert_listings does."""
+    from django.db import transaction
+
+    from wgwatch.models import RealEstateListing
+
+    def write_batch() -> None:
+        with transaction.atomic():
+            RealEstateListing.objects.bulk_create(
+                _build_listings(batch_size), batch_size=100
+            )
+
+    return _run_until(time.perf_counter() + duration_s, write_batch)
+
+
+def _prepare(duration_s: float) -> WorkerResult:
+    """Refresh the materialized tables while the others write and read."""
+    return _run_until(time.perf_counter() + duration_s, refresh_tables)
+
+
+def _read(duration_s: float) -> WorkerResult:
+    """Load what the home and map pages load."""
+    from wgwatch.dataloader import (
+        load_catalog,
+        load_city_comparison_data,
+        load_listing_location_columns,
+    )
+
+    def read() -> None:
+        catalog = load_catalog()
+        load_city_comparison_data(
+            SelectedCities(payload=random.sample(_CITIES, 2)),
+            catalog.date_range(None, None),
+        )
+        load_listing_location_columns(
+            random.choice(_CITIES), random.choice(_OFFER_TYPES)
+        )
+
+    return _run_until(time.perf_counter() + duration_s, read)
+
+
+class SqliteConcurrencyTest(SimpleTestCase):
+    """The tuned profile lets scraper, data_prepper and app work at once."""
+
+    def test_no_lock_errors_and_fast_readers(self):
+        with scratch_db_executor(
+            max_workers=_N_WRITERS + 1 + _N_READERS, profile="tuned"
+        ) as executor:
+            executor.submit(_migrate_and_seed, 5_000).result()
+
+            futures = {
+                "writer": [
+                    executor.submit(_write, _DURATION_S, 500)
+                    for _ in range(_N_WRITERS)
+                ],
+                "data_prepper": [executor.submit(_prepare, _DURATION_S)],
+                "reader": [
+                    executor.submit(_read, _DURATION_S)
+                    for _ in range(_N_READERS)
+                ],
+            }
+            results = [
+                RoleResult.summarize(
+                    role, [future.result() for future in role_futures]
+                )
+                for role, role_futures in futures.items()
+            ]
+
+        # Reported with the test run, to compare machines and profiles
+        sys.stderr.write("".join(f"\n{result}" for result in results) + "\n")
+        for result in results:
+            with self.subTest(role=result.role):
+                self.assertEqual(result.n_lock_errors, 0, str(result))
+                self.assertGreaterEqual(
+                    result.n_operations, result.n_workers, str(result)
+                )
+                if result.role == "reader":
+                    self.assertLess(
+                        result.latency_p99_s, _MAX_READER_P99_S, str(result)
+                    )
@@ -0,0 +1,146 @@
+import functools
+import gzip
+import hashlib
+import json
+import re
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+
+from .dataloader import aload_data_version
+from .grid import snap_to_tiles
+from .types import MapViewport
+
+# Like django.middleware.gzip
+_ACCEPTS_GZIP_RE = re.compile(r"\bgzip\b")
+
+
+def accepts_gzip(request) -> bool:
+    return bool(
+        _ACCEPTS_GZIP_RE.search(request.headers.get("Accept-Encoding", ""))
+    )
+
+
+def _viewport_params(request) -> dict[str, Any] | None:
+    """The map view is built for the tiles of the bounding box."""
+    zoom = request.GET.get("zoom")
+    bbox = request.GET.get("bbox")
+    if zoom is None and bbox is None:
+        return None
+    try:
+        viewport = MapViewport.from_query_params(zoom, bbox)
+    # Also raised by pydantic, the view rejects these
+    except ValueError:
+        return {"zoom": zoom, "bbox": bbox}
+
+    return snap_to_tiles(viewport).model_dump()
+
+
+def _params_hash(request) -> str:
+    # The views only read these, in any order
+    params = {
+        "citiesSelection": sorted(request.GET.getlist("citiesSelection")),
+        "citySelection": request.GET.get("citySelection"),
+        "offerSelection": request.GET.get("offerSelection"),
+        "dateFrom": request.GET.get("dateFrom"),
+        "dateTo": request.GET.get("dateTo"),
+        "viewport": _viewport_params(request),
+    }
+    return hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def response_cache_key(view_name: str, request, data_version: int) -> str:
+    return f"response:{view_name}:{data_version}:{_params_hash(request)}"
+
+
+def cache_response_by_data_version(view):
+    """Serve the rendered page of an async view until data_prepper bumps
+    the data version.
+
+    Entries of older versions are never read again and get evicted by the
+    cache backend.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        key = response_cache_key(
+            view.__name__, request, await aload_data_version()
+        )
+
+        cached = await cache.aget(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            await cache.aset(key, (response.content, response["Content-Type"]))
+
+        return response
+
+    return wrapper
+
+
+def _patch_json_headers(response: HttpResponse, etag: str) -> None:
+    # Also on a 304, which updates the cached response's headers
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    patch_cache_control(response, no_cache=True)
+
+
+def cache_json_by_data_version(view):
+    """Serve the pydantic model returned by an async view as gzipped JSON.
+
+    The payload is compressed once per data version and parameters. The
+    ETag changes with both and the encoding, so browsers revalidate with
+    If-None-Match and get a 304 until data_prepper bumps the data version.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        data_version = await aload_data_version()
+        gzipped = accepts_gzip(request)
+        # Strong validators, so one per representation
+        etag = (
+            f'"{data_version}-{_params_hash(request)[:32]}'
+            f'{"-gzip" if gzipped else ""}"'
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            _patch_json_headers(not_modified, etag)
+            return not_modified
+
+        cache = caches[settings.JSON_CACHE_ALIAS]
+        key = response_cache_key(view.__name__, request, data_version)
+        compressed = await cache.aget(key)
+        if compressed is None:
+            payload = await view(request, *args, **kwargs)
+            if isinstance(payload, HttpResponse):
+                return payload
+            compressed = gzip.compress(
+                payload.model_dump_json().encode(), mtime=0
+            )
+            await cache.aset(key, compressed)
+
+        if gzipped:
+            response = HttpResponse(compressed, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(
+                gzip.decompress(compressed), content_type="application/json"
+            )
+
+        _patch_json_headers(response, etag)
+        return response
+
+    return wrapper
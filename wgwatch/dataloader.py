@@ -1,129 +1,141 @@
+import asyncio
+import functools
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from django.db import connection
-from jinja2 import Template
+from django.conf import settings
+from django.db import close_old_connections
 
+from .grid import build_map_view
+from .queries import queries
 from .types import (
+    Catalog,
     City,
+    DateRange,
+    ListingLocationColumns,
+    MapView,
+    MapViewport,
     OfferType,
-    RealEstateListingsWithLocation,
-    ScrapeDates,
     SelectedCities,
 )
 
+# The async loaders run the queries here, so slow queries can't take up
+# more than DB_EXECUTOR_WORKERS threads and connections
+_db_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_EXECUTOR_WORKERS, thread_name_prefix="db"
+)
+
+
+def _with_fresh_connection[T](func: Callable[..., T], *args: Any) -> T:
+    # Outside of a request nothing else applies CONN_MAX_AGE in these threads
+    close_old_connections()
+    return func(*args)
+
+
+async def _run_in_db_executor[T](func: Callable[..., T], *args: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _db_executor, functools.partial(_with_fresh_connection, func, *args)
+    )
+
 
 def load_city_comparison_data(
-    selected_cities: SelectedCities,
+    selected_cities: SelectedCities, date_range: DateRange
 ) -> list[dict[str, Any]]:
-    with open("input/sql/city_comparison.sql") as f:
-        raw_template = f.read()
-
-    template = Template(raw_template)
-    rendered_query = template.render(selected_cities=selected_cities.payload)
+    """One row per offer type and day, week or month of the date range."""
+    params: dict[str, str] = {
+        f"city_{i}": city
+        for i, city in enumerate(selected_cities.payload, start=1)
+    }
+    params["date_from"] = date_range.date_from.isoformat()
+    params["date_to"] = date_range.date_to.isoformat()
+
+    return queries["city_comparison"].fetch_all(
+        params,
+        n_cities=len(selected_cities.payload),
+        bucket=date_range.bucket(),
+    )
 
-    with connection.cursor() as cursor:
-        cursor.execute(rendered_query)
-        columns = [col[0] for col in cursor.description]
-        rows = cursor.fetchall()
 
-    # Combine columns and rows into a list of dictionaries (optional if easier in template)
-    city_comparison_data = [dict(zip(columns, row)) for row in rows]
+def load_data_version() -> int:
+    rows = queries["data_version"].fetch_all()
 
-    return city_comparison_data
+    return rows[0]["version"] if rows else 0
 
 
-def load_scrape_dates() -> ScrapeDates:
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            select distinct
+# Only reloaded once data_prepper has bumped the data version
+_catalog: Catalog | None = None
 
-                date(job_insert_time) as scraped_date
 
-            from latest_realestatelisting_per_day
-            order by
-                scraped_date desc
-            ;
-        """
-        )
+def load_catalog() -> Catalog:
+    global _catalog
 
-        rows = cursor.fetchall()
+    data_version = load_data_version()
+    if _catalog is not None and _catalog.data_version == data_version:
+        return _catalog
 
-    # Combine columns and rows into a list of dictionaries (optional if easier in template)
-    scrape_dates = [row[0] for row in rows]
-    scrape_dates_validated = ScrapeDates.model_validate({"data": scrape_dates})
+    _catalog = Catalog.model_validate(
+        {
+            "data_version": data_version,
+            "data": queries["catalog"].fetch_all(),
+        }
+    )
 
-    return scrape_dates_validated
+    return _catalog
 
 
-def load_listings_with_locations(
+def load_listing_location_columns(
     city: City, offer_type: OfferType
-) -> RealEstateListingsWithLocation:
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-                with listings as (
-                    select
-
-                        listing.street_address,
-                        listing.address_locality,
-                        listing.name,
-                        listing.url,
-                        listing.price,
-                        listing.square_meters,
-
-                        location.latitude,
-                        location.longitude,
-
-                        rank() over (order by price) as price_rank,
-                        count(*) over () as n_listings
-
-                    from latest_realestatelisting_per_day
-                        as listing
-
-                    left join wgwatch_realestatelocation
-                        as location
-
-                    on listing.street_address = location.street_address
-                    and listing.address_locality = location.address_locality
-                    and listing.address_region = location.address_region
-                    and listing.postal_code = location.postal_code
-                    and listing.address_country = location.address_country
-
-                    where listing.address_locality = %s
-                    and listing.offer_type = %s
-                    and location.latitude is not null
-                    and location.longitude is not null
-                    and date(job_insert_time) = (
-                        select
-                            max(date(job_insert_time))
-                        from latest_realestatelisting_per_day
-                    )
-                )
-
-                select 
-
-                    listings.*,
-
-                    (cast(listings.price_rank - 1 as float))
-                    / (listings.n_listings - 1)
-                        as price_rank_normalized    
-
-                from listings
-                    as listings
-                ;
-        """,
-            [city, offer_type],
-        )
-
-        rows = cursor.fetchall()
-        columns = [col[0] for col in cursor.description]
-
-    listings_with_locations = [dict(zip(columns, row)) for row in rows]
-    listings_with_locations_validated = (
-        RealEstateListingsWithLocation.model_validate(
-            {"data": listings_with_locations}
-        )
+) -> ListingLocationColumns:
+    rows = queries["listings_with_locations"].fetch_all(
+        {"city": city, "offer_type": offer_type}
+    )
+
+    return ListingLocationColumns.model_validate(
+        {
+            column: [row[column] for row in rows]
+            for column in ListingLocationColumns.model_fields
+        }
+    )
+
+
+# The listings of each city and offer type with the data version they were
+# loaded at, reloaded once data_prepper has bumped it
+_listing_location_columns: dict[
+    tuple[City, OfferType], tuple[int, ListingLocationColumns]
+] = {}
+
+
+def load_map_view(
+    city: City, offer_type: OfferType, viewport: MapViewport
+) -> MapView:
+    data_version = load_data_version()
+    cached = _listing_location_columns.get((city, offer_type))
+    if cached is None or cached[0] != data_version:
+        cached = (data_version, load_listing_location_columns(city, offer_type))
+        _listing_location_columns[(city, offer_type)] = cached
+
+    return build_map_view(cached[1], viewport)
+
+
+async def aload_city_comparison_data(
+    selected_cities: SelectedCities, date_range: DateRange
+) -> list[dict[str, Any]]:
+    return await _run_in_db_executor(
+        load_city_comparison_data, selected_cities, date_range
     )
 
-    return listings_with_locations_validated
+
+async def aload_data_version() -> int:
+    return await _run_in_db_executor(load_data_version)
+
+
+async def aload_catalog() -> Catalog:
+    return await _run_in_db_executor(load_catalog)
+
+
+async def aload_map_view(
+    city: City, offer_type: OfferType, viewport: MapViewport
+) -> MapView:
+    return await _run_in_db_executor(load_map_view, city, offer_type, viewport)
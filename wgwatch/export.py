@@ -0,0 +1,152 @@
+import asyncio
+import csv
+import io
+import json
+import threading
+import zlib
+from collections.abc import AsyncGenerator, Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.db import connection
+
+from .queries import queries
+from .types import ExportFilter, ExportFormat
+
+EXPORT_CONTENT_TYPES: dict[ExportFormat, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+# Rows fetched, encoded and compressed at a time
+EXPORT_CHUNK_ROWS = 2000
+
+
+def _encode_csv(columns: list[str], rows: list[tuple], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(columns: list[str], rows: list[tuple]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str)
+        + "\n"
+        for row in rows
+    ).encode()
+
+
+def iter_export(
+    export_filter: ExportFilter, export_format: ExportFormat, compress: bool
+) -> Generator[bytes]:
+    """The listings of latest_realestatelisting_per_day, chunk by chunk.
+
+    Rows come in index order, unsorted, and only one chunk of them is in
+    memory at a time. Compressed chunks together form one gzip stream.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    params = {
+        "city": export_filter.city,
+        "offer_type": export_filter.offer_type,
+        "date_from": export_filter.date_from.isoformat(),
+        "date_to": export_filter.date_to.isoformat(),
+    }
+
+    with queries["export_listings"].execute(
+        params,
+        by_city=export_filter.city is not None,
+        by_offer_type=export_filter.offer_type is not None,
+    ) as cursor:
+        columns = [col[0] for col in cursor.description]
+        header = export_format == "csv"
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows and not header:
+                break
+
+            if export_format == "csv":
+                chunk = _encode_csv(columns, rows, header)
+                header = False
+            else:
+                chunk = _encode_ndjson(columns, rows)
+
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+# Exports at a time, each runs on one of these threads from start to end
+_export_executor = ThreadPoolExecutor(
+    max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export"
+)
+# Chunks an export may have ready before the client has read them
+_EXPORT_QUEUE_CHUNKS = 4
+
+
+def _produce_export(
+    export_filter: ExportFilter,
+    export_format: ExportFormat,
+    compress: bool,
+    put: Callable[[bytes | None], None],
+    stopped: threading.Event,
+) -> None:
+    try:
+        for chunk in iter_export(export_filter, export_format, compress):
+            put(chunk)
+            if stopped.is_set():
+                break
+    finally:
+        # Nothing else closes the connection of this thread
+        connection.close()
+        put(None)
+
+
+async def aiter_export(
+    export_filter: ExportFilter, export_format: ExportFormat, compress: bool
+) -> AsyncGenerator[bytes]:
+    """iter_export, run in a thread of its own to keep the event loop free.
+
+    The SQLite cursor may only be used from the thread that opened it, so
+    the whole export runs on one thread of a bounded pool and hands its
+    chunks over through a short queue. An async iterator also keeps Django
+    from reading a sync one into a list before sending it.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[bytes | None] = asyncio.Queue(
+        maxsize=_EXPORT_QUEUE_CHUNKS
+    )
+    stopped = threading.Event()
+
+    def put(chunk: bytes | None) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+
+    producer = asyncio.wrap_future(
+        _export_executor.submit(
+            _produce_export,
+            export_filter,
+            export_format,
+            compress,
+            put,
+            stopped,
+        )
+    )
+    try:
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+    finally:
+        stopped.set()
+        # Take what the producer still puts, e.g. when the client is gone
+        while not producer.done():
+            getter: asyncio.Future[Any] = asyncio.ensure_future(queue.get())
+            await asyncio.wait(
+                {getter, producer}, return_when=asyncio.FIRST_COMPLETED
+            )
+            getter.cancel()
+        await producer
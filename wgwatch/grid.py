@@ -0,0 +1,169 @@
+import math
+import statistics
+from collections import defaultdict
+
+from .types import (
+    BoundingBox,
+    ListingLocationColumns,
+    MapCellColumns,
+    MapView,
+    MapViewport,
+)
+
+# From this zoom on the map shows single listings instead of cells
+LISTINGS_MIN_ZOOM = 15
+# Edge length of a cell on screen, Leaflet tiles are 256px
+CELL_SIZE_PX = 64
+_CELLS_PER_TILE = 256 // CELL_SIZE_PX
+# Web Mercator stops here
+_MAX_LATITUDE = 85.05112878
+
+
+def _cell(latitude: float, longitude: float, zoom: int) -> tuple[int, int]:
+    """Web Mercator cell of a point, cells are square on screen."""
+    n_cells = 2**zoom * _CELLS_PER_TILE
+    latitude = max(-_MAX_LATITUDE, min(_MAX_LATITUDE, latitude))
+    x = (longitude + 180) / 360 * n_cells
+    y = (
+        (1 - math.asinh(math.tan(math.radians(latitude))) / math.pi)
+        / 2
+        * n_cells
+    )
+    return (
+        min(int(x), n_cells - 1),
+        min(int(y), n_cells - 1),
+    )
+
+
+def _tile_longitude(x: int, n_tiles: int) -> float:
+    return x / n_tiles * 360 - 180
+
+
+def _tile_latitude(y: int, n_tiles: int) -> float:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n_tiles))))
+
+
+def snap_to_tiles(viewport: MapViewport) -> MapViewport:
+    """Grow the bounding box to the map tiles it touches.
+
+    Small pans then map to the same viewport and so the same cached
+    response, and cells on the edge keep all their listings.
+    """
+    n_tiles = 2**viewport.zoom
+    bbox = viewport.bbox
+    west, north = _cell(bbox.north, bbox.west, viewport.zoom)
+    east, south = _cell(bbox.south, bbox.east, viewport.zoom)
+    west, north = west // _CELLS_PER_TILE, north // _CELLS_PER_TILE
+    east, south = east // _CELLS_PER_TILE + 1, south // _CELLS_PER_TILE + 1
+
+    return MapViewport(
+        zoom=viewport.zoom,
+        bbox=BoundingBox(
+            west=_tile_longitude(west, n_tiles),
+            south=(-90 if south == n_tiles else _tile_latitude(south, n_tiles)),
+            east=_tile_longitude(east, n_tiles),
+            north=90 if north == 0 else _tile_latitude(north, n_tiles),
+        ),
+    )
+
+
+def _in_bbox(latitude: float, longitude: float, bbox: BoundingBox) -> bool:
+    return (
+        bbox.south <= latitude <= bbox.north
+        and bbox.west <= longitude <= bbox.east
+    )
+
+
+def _listings_in_bbox(
+    listings: ListingLocationColumns, bbox: BoundingBox
+) -> list[int]:
+    return [
+        i
+        for i, (latitude, longitude) in enumerate(
+            zip(listings.latitude, listings.longitude)
+        )
+        if _in_bbox(latitude, longitude, bbox)
+    ]
+
+
+def aggregate_cells(
+    listings: ListingLocationColumns, viewport: MapViewport
+) -> MapCellColumns:
+    cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+    for i in _listings_in_bbox(listings, viewport.bbox):
+        cells[
+            _cell(listings.latitude[i], listings.longitude[i], viewport.zoom)
+        ].append(i)
+
+    columns = MapCellColumns(
+        latitude=[],
+        longitude=[],
+        n_listings=[],
+        price_median=[],
+        price_per_square_meter_mean=[],
+        price_rank_normalized=[],
+    )
+    for indices in cells.values():
+        prices: list[float] = []
+        prices_per_square_meter: list[float] = []
+        ranks: list[float] = []
+        for i in indices:
+            price = listings.price[i]
+            square_meters = listings.square_meters[i]
+            rank = listings.price_rank_normalized[i]
+            if price is not None:
+                prices.append(price)
+                if square_meters:
+                    prices_per_square_meter.append(price / square_meters)
+            if rank is not None:
+                ranks.append(rank)
+
+        columns.latitude.append(
+            statistics.fmean(listings.latitude[i] for i in indices)
+        )
+        columns.longitude.append(
+            statistics.fmean(listings.longitude[i] for i in indices)
+        )
+        columns.n_listings.append(len(indices))
+        columns.price_median.append(
+            statistics.median(prices) if prices else None
+        )
+        columns.price_per_square_meter_mean.append(
+            statistics.fmean(prices_per_square_meter)
+            if prices_per_square_meter
+            else None
+        )
+        columns.price_rank_normalized.append(
+            statistics.fmean(ranks) if ranks else None
+        )
+
+    return columns
+
+
+def build_map_view(
+    listings: ListingLocationColumns, viewport: MapViewport
+) -> MapView:
+    """Aggregate the listings in the viewport unless zoomed in far enough.
+
+    The payload is bounded by the number of cells on screen, not by the
+    number of listings in the city.
+    """
+    viewport = snap_to_tiles(viewport)
+    if viewport.zoom < LISTINGS_MIN_ZOOM:
+        return MapView(
+            zoom=viewport.zoom,
+            cells=aggregate_cells(listings, viewport),
+            listings=None,
+        )
+
+    indices = _listings_in_bbox(listings, viewport.bbox)
+    return MapView(
+        zoom=viewport.zoom,
+        cells=None,
+        listings=ListingLocationColumns.model_validate(
+            {
+                column: [getattr(listings, column)[i] for i in indices]
+                for column in ListingLocationColumns.model_fields
+            }
+        ),
+    )
@@ -0,0 +1,52 @@
+import sys
+from typing import get_args
+
+from django.core.management.base import BaseCommand, CommandError
+from pydantic import ValidationError
+
+from wgwatch.export import iter_export
+from wgwatch.types import ExportFilter, ExportFormat
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the latest listing per url and day as CSV or NDJSON, with"
+        " constant memory whatever the number of rows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--city")
+        parser.add_argument("--offer-type")
+        parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+        parser.add_argument(
+            "--format", choices=get_args(ExportFormat), default="csv"
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress the output"
+        )
+        parser.add_argument(
+            "--output", "-o", help="File to write to, defaults to stdout"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            export_filter = ExportFilter(
+                city=options["city"],
+                offer_type=options["offer_type"],
+                **{
+                    field: options[field]
+                    for field in ["date_from", "date_to"]
+                    if options[field]
+                },
+            )
+        except ValidationError as e:
+            raise CommandError(str(e)) from e
+
+        chunks = iter_export(export_filter, options["format"], options["gzip"])
+        if options["output"]:
+            with open(options["output"], "wb") as f:
+                f.writelines(chunks)
+        else:
+            sys.stdout.buffer.writelines(chunks)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wgwatch", "0002_realestatelocation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeenListing",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("listing_id", models.BigIntegerField(unique=True)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("first_seen", models.DateTimeField()),
+                ("last_seen", models.DateTimeField()),
+                (
+                    "latest_snapshot",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="wgwatch.realestatelisting",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wgwatch", "0003_seenlisting"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScrapeCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("run_id", models.CharField(max_length=64)),
+                ("city", models.CharField(max_length=50)),
+                ("last_committed_page", models.IntegerField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("running", "Running"), ("finished", "Finished")],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("run_id", "city"), name="unique_checkpoint_per_city"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wgwatch", "0004_scrapecheckpoint"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="realestatelisting",
+            name="job_insert_time",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,177 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:40
+
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+ADDRESS_FIELDS = [
+    "street_address",
+    "address_locality",
+    "address_region",
+    "postal_code",
+    "address_country",
+]
+
+
+# Copies of wgwatch.models as of this migration, which must not change
+# with the model code
+def _normalize_address_part(part):
+    if part is None:
+        return None
+    return " ".join(part.split()).casefold() or None
+
+
+def _hash64(value):
+    digest = hashlib.sha256(value.encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def address_key(
+    street_address,
+    address_locality,
+    address_region,
+    postal_code,
+    address_country,
+):
+    parts = [
+        _normalize_address_part(part)
+        for part in (
+            street_address,
+            address_locality,
+            address_region,
+            postal_code,
+            address_country,
+        )
+    ]
+    if not any(parts):
+        return None
+
+    return _hash64(json.dumps(parts))
+
+
+def fill_address_keys(apps, schema_editor):
+    # SQLite only: computing the keys in SQL needs no index on the parts
+    connection = schema_editor.connection
+    connection.ensure_connection()
+    connection.connection.create_function(
+        "address_key", len(ADDRESS_FIELDS), address_key, deterministic=True
+    )
+    parts = ", ".join(ADDRESS_FIELDS)
+
+    with connection.cursor() as cursor:
+        for table in [
+            "wgwatch_realestatelisting",
+            "wgwatch_realestatelocation",
+        ]:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO wgwatch_address (id, {parts})
+                SELECT address_key({parts}), {parts}
+                FROM {table}
+                WHERE address_key({parts}) IS NOT NULL;
+            """)
+        cursor.execute(f"""
+            UPDATE wgwatch_realestatelisting
+            SET address_id = address_key({parts});
+        """)
+        # Addresses with NULL parts never matched the old join and could be
+        # geocoded more than once, only the first location keeps the key
+        cursor.execute(f"""
+            UPDATE wgwatch_realestatelocation
+            SET address_id = address_key({parts})
+            WHERE id IN (
+                SELECT MIN(id)
+                FROM wgwatch_realestatelocation
+                WHERE address_key({parts}) IS NOT NULL
+                GROUP BY address_key({parts})
+            );
+        """)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wgwatch", "0005_realestatelisting_job_insert_time_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="realestatelisting",
+            name="scrape_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        # job_insert_time is stored in UTC
+        migrations.RunSQL(
+            "UPDATE wgwatch_realestatelisting"
+            " SET scrape_date = DATE(job_insert_time)",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="realestatelisting",
+            index=models.Index(
+                fields=["url", "scrape_date", "-job_insert_time"],
+                name="listing_url_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="realestatelisting",
+            index=models.Index(
+                fields=["address_locality", "offer_type", "scrape_date"],
+                name="listing_city_offer_date_idx",
+            ),
+        ),
+        migrations.CreateModel(
+            name="Address",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                (
+                    "street_address",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "address_locality",
+                    models.CharField(blank=True, max_length=100, null=True),
+                ),
+                (
+                    "address_region",
+                    models.CharField(blank=True, max_length=100, null=True),
+                ),
+                (
+                    "postal_code",
+                    models.CharField(blank=True, max_length=20, null=True),
+                ),
+                (
+                    "address_country",
+                    models.CharField(blank=True, max_length=100, null=True),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="realestatelisting",
+            name="address",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="listings",
+                to="wgwatch.address",
+            ),
+        ),
+        migrations.AddField(
+            model_name="realestatelocation",
+            name="address",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="location",
+                to="wgwatch.address",
+            ),
+        ),
+        migrations.RunPython(
+            fill_address_keys, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wgwatch", "0006_scrape_date_and_address"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="realestatelisting",
+            name="listing_url_date_idx",
+        ),
+        migrations.AddIndex(
+            model_name="realestatelisting",
+            index=models.Index(
+                fields=["scrape_date", "url", "-job_insert_time"],
+                name="listing_date_url_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:52
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TEXT_FIELDS = ["description", "image"]
+
+
+# Copy of wgwatch.models.text_key as of this migration, which must not
+# change with the model code
+def text_key(text):
+    digest = hashlib.sha256(text.encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def move_texts(apps, schema_editor):
+    # SQLite only: hashing in SQL keeps the texts out of Python memory
+    connection = schema_editor.connection
+    connection.ensure_connection()
+    connection.connection.create_function(
+        "text_key", 1, text_key, deterministic=True
+    )
+
+    with connection.cursor() as cursor:
+        for field in TEXT_FIELDS:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO wgwatch_listingtext (id, text)
+                SELECT text_key({field}_inline), {field}_inline
+                FROM wgwatch_realestatelisting
+                WHERE {field}_inline IS NOT NULL AND {field}_inline != '';
+            """)
+            cursor.execute(f"""
+                UPDATE wgwatch_realestatelisting
+                SET {field}_id = text_key({field}_inline)
+                WHERE {field}_inline IS NOT NULL AND {field}_inline != '';
+            """)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("wgwatch", "0008_listing_date_url_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ListingText",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("text", models.TextField()),
+            ],
+        ),
+        migrations.RenameField(
+            model_name="realestatelisting",
+            old_name="description",
+            new_name="description_inline",
+        ),
+        migrations.RenameField(
+            model_name="realestatelisting",
+            old_name="image",
+            new_name="image_inline",
+        ),
+        migrations.AddField(
+            model_name="realestatelisting",
+            name="description",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="wgwatch.listingtext",
+            ),
+        ),
+        migrations.AddField(
+            model_name="realestatelisting",
+            name="image",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="wgwatch.listingtext",
+            ),
+        ),
+        migrations.RunPython(
+            move_texts, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.RemoveField(
+            model_name="realestatelisting",
+            name="description_inline",
+        ),
+        migrations.RemoveField(
+            model_name="realestatelisting",
+            name="image_inline",
+        ),
+    ]
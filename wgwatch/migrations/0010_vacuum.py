@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # VACUUM can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("wgwatch", "0009_listingtext"),
+    ]
+
+    operations = [
+        # Gives the space of the moved texts back, rewrites the whole file
+        migrations.RunSQL("VACUUM;", reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wgwatch", "0010_vacuum"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ListingSighting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("listed_on_page", models.IntegerField(blank=True, null=True)),
+                ("seen_at", models.DateTimeField()),
+                ("scrape_date", models.DateField()),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="wgwatch.realestatelisting",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["scrape_date"], name="sighting_date_idx")
+                ],
+            },
+        ),
+    ]
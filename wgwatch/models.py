@@ -1,4 +1,74 @@
+import datetime
+import hashlib
+import json
+
 from django.db import models
+from django.utils import timezone
+
+
+def _normalize_address_part(part: str | None) -> str | None:
+    if part is None:
+        return None
+    return " ".join(part.split()).casefold() or None
+
+
+def address_key(
+    street_address: str | None,
+    address_locality: str | None,
+    address_region: str | None,
+    postal_code: str | None,
+    address_country: str | None,
+) -> int | None:
+    """Stable, signed 64-bit hash of the normalized address parts.
+
+    Missing parts are part of the key, so unlike a join on the text columns
+    addresses with NULL parts still match. None if all parts are missing.
+    """
+    parts = [
+        _normalize_address_part(part)
+        for part in (
+            street_address,
+            address_locality,
+            address_region,
+            postal_code,
+            address_country,
+        )
+    ]
+    if not any(parts):
+        return None
+
+    return _hash64(json.dumps(parts))
+
+
+def text_key(text: str) -> int:
+    return _hash64(text)
+
+
+def _hash64(value: str) -> int:
+    digest = hashlib.sha256(value.encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+class Address(models.Model):
+    # address_key of the parts below, the same on every machine and run
+    id = models.BigIntegerField(primary_key=True)
+    street_address = models.CharField(max_length=255, null=True, blank=True)
+    address_locality = models.CharField(max_length=100, null=True, blank=True)
+    address_region = models.CharField(max_length=100, null=True, blank=True)
+    postal_code = models.CharField(max_length=20, null=True, blank=True)
+    address_country = models.CharField(max_length=100, null=True, blank=True)
+
+
+class ListingText(models.Model):
+    """Long texts that repeat across snapshots, stored once per content."""
+
+    # text_key of the text
+    id = models.BigIntegerField(primary_key=True)
+    text = models.TextField()
+
+    @classmethod
+    def for_text(cls, text: str | None) -> "ListingText | None":
+        return cls(id=text_key(text), text=text) if text else None
 
 
 class RealEstateListing(models.Model):
@@ -7,9 +77,21 @@ class RealEstateListing(models.Model):
     # Listing details
     name = models.CharField(max_length=255, null=True, blank=True)
     url = models.URLField(null=True, blank=True)
-    description = models.TextField(null=True, blank=True)
+    description = models.ForeignKey(
+        ListingText,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="+",
+    )
     date_posted = models.DateField(null=True, blank=True)
-    image = models.URLField(null=True, blank=True)
+    image = models.ForeignKey(
+        ListingText,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="+",
+    )
 
     # Offer details
     offer_type = models.CharField(max_length=50, null=True, blank=True)
@@ -29,13 +111,43 @@ class RealEstateListing(models.Model):
     address_region = models.CharField(max_length=100, null=True, blank=True)
     postal_code = models.CharField(max_length=20, null=True, blank=True)
     address_country = models.CharField(max_length=100, null=True, blank=True)
+    address = models.ForeignKey(
+        Address,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="listings",
+    )
 
-    # Scraper job timestamp
-    job_insert_time = models.DateTimeField(auto_now_add=True)
+    # Scraper job timestamp, the page's fetch time (also when replayed)
+    job_insert_time = models.DateTimeField(default=timezone.now)
+    # UTC date of job_insert_time, stored so it can be indexed
+    scrape_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Latest snapshot per url and day in data_prepper, which only
+            # refreshes the scrape dates with new listings
+            models.Index(
+                fields=["scrape_date", "url", "-job_insert_time"],
+                name="listing_date_url_idx",
+            ),
+            models.Index(
+                fields=["address_locality", "offer_type", "scrape_date"],
+                name="listing_city_offer_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name or f"Listing #{self.id}"
 
+    def save(self, *args, **kwargs) -> None:
+        if self.scrape_date is None:
+            self.scrape_date = self.job_insert_time.astimezone(
+                datetime.UTC
+            ).date()
+        super().save(*args, **kwargs)
+
 
 class RealEstateLocation(models.Model):
     street_address = models.CharField(max_length=255, null=True, blank=True)
@@ -44,5 +156,68 @@ class RealEstateLocation(models.Model):
     postal_code = models.CharField(max_length=20, null=True, blank=True)
     address_country = models.CharField(max_length=100, null=True, blank=True)
 
+    # Null for locations geocoded twice before addresses had a key
+    address = models.OneToOneField(
+        Address,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="location",
+    )
+
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+
+
+class SeenListing(models.Model):
+    # Numeric id from the listing url, see scraper._extract_listing_id_from_url
+    listing_id = models.BigIntegerField(unique=True)
+    # Hash over price, square meters, name and description
+    content_hash = models.CharField(max_length=64)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    latest_snapshot = models.ForeignKey(
+        RealEstateListing, null=True, blank=True, on_delete=models.SET_NULL
+    )
+
+
+class ListingSighting(models.Model):
+    """An unchanged listing seen again, stored instead of a new snapshot.
+
+    data_prepper counts the sighted snapshot on the sighting's scrape date.
+    """
+
+    snapshot = models.ForeignKey(
+        RealEstateListing, on_delete=models.CASCADE, related_name="+"
+    )
+    listed_on_page = models.IntegerField(null=True, blank=True)
+    # The page's fetch time and its UTC date, like a snapshot's
+    seen_at = models.DateTimeField()
+    scrape_date = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["scrape_date"], name="sighting_date_idx"),
+        ]
+
+
+class ScrapeCheckpoint(models.Model):
+    class Status(models.TextChoices):
+        RUNNING = "running"
+        FINISHED = "finished"
+
+    run_id = models.CharField(max_length=64)
+    city = models.CharField(max_length=50)
+    # Written in the same transaction as the page's listings
+    last_committed_page = models.IntegerField(null=True, blank=True)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.RUNNING
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["run_id", "city"], name="unique_checkpoint_per_city"
+            )
+        ]
@@ -0,0 +1,103 @@
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.db import connection
+from jinja2 import Environment, StrictUndefined, Template
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+SQL_DIR = settings.BASE_DIR / "input" / "sql"
+
+
+class QueryStats(BaseModel):
+    n_executions: int = 0
+    total_seconds: float = 0
+    last_seconds: float | None = None
+    last_row_count: int | None = None
+
+
+class SqlQuery:
+    """A compiled input/sql template, executed with bound parameters.
+
+    Template variables only shape the SQL (e.g. how many cities get a
+    column), values always go into the parameters. The rendered SQL is
+    cached per distinct set of template variables.
+    """
+
+    def __init__(self, name: str, template: Template) -> None:
+        self.name = name
+        self.template = template
+        self.stats = QueryStats()
+        self._rendered: dict[tuple[tuple[str, Any], ...], str] = {}
+
+    def sql(self, **shape: Any) -> str:
+        key = tuple(sorted(shape.items()))
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self.template.render(**shape)
+            self._rendered[key] = rendered
+
+        return rendered
+
+    @contextmanager
+    def execute(
+        self, params: dict[str, Any] | None = None, **shape: Any
+    ) -> Iterator[Any]:
+        """Run the query and hand out the cursor to fetch the rows from.
+
+        The stats include the time until the cursor is given back.
+        """
+        sql = self.sql(**shape)
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params or {})
+            yield cursor
+        seconds = time.perf_counter() - start
+
+        self.stats.n_executions += 1
+        self.stats.total_seconds += seconds
+        self.stats.last_seconds = seconds
+        self.stats.last_row_count = None
+
+    def fetch_all(
+        self, params: dict[str, Any] | None = None, **shape: Any
+    ) -> list[dict[str, Any]]:
+        with self.execute(params, **shape) as cursor:
+            columns = [col[0] for col in cursor.description]
+            rows = cursor.fetchall()
+
+        self.stats.last_row_count = len(rows)
+        seconds = self.stats.last_seconds or 0.0
+        logger.debug(
+            f"{self.name}: {len(rows)} rows in {seconds * 1000:.2f} ms"
+        )
+
+        return [dict(zip(columns, row)) for row in rows]
+
+
+class QueryRegistry:
+    def __init__(self, sql_dir: Path) -> None:
+        environment = Environment(undefined=StrictUndefined, autoescape=False)
+        self._queries = {
+            path.stem: SqlQuery(
+                name=path.stem,
+                template=environment.from_string(path.read_text()),
+            )
+            for path in sorted(sql_dir.glob("*.sql"))
+        }
+
+    def __getitem__(self, name: str) -> SqlQuery:
+        return self._queries[name]
+
+    def stats(self) -> dict[str, QueryStats]:
+        return {name: query.stats for name, query in self._queries.items()}
+
+
+# Loaded and compiled once, when the app starts
+queries = QueryRegistry(SQL_DIR)
@@ -79,11 +79,80 @@ WSGI_APPLICATION = "wgwatch.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuning profiles, picked with DB_PROFILE. "tuned" lets the scraper,
+# the geocoder processes and the app's readers work concurrently: in WAL
+# mode readers never block the writer, writers take the write lock when
+# their transaction starts and wait up to 20s for it instead of failing
+# with "database is locked".
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        "init_command": (
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA cache_size=-65536;"
+            "PRAGMA mmap_size=268435456;"
+            "PRAGMA temp_store=MEMORY;"
+        ),
+        "transaction_mode": "IMMEDIATE",
+        "timeout": 20,
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned")
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.getenv("DB_PATH", BASE_DIR / "db.sqlite3"),
+        "OPTIONS": SQLITE_PROFILES[DB_PROFILE],
+        # Reuse connections across requests, so the pragmas only run once
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Threads (and so connections) the async views run their queries in
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+# Threads (and so connections) for /api/export, one per running export
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+
+
+# Rendered pages of the home and map views, keyed by the data version that
+# data_prepper bumps, see wgwatch/cache.py. The local-memory backend evicts
+# the least recently used pages, RESPONSE_CACHE_DIR switches to files that
+# all workers share.
+RESPONSE_CACHE_ALIAS = "responses"
+# The gzipped JSON of the map view, kept apart so panning around the map
+# can't evict the rendered pages
+JSON_CACHE_ALIAS = "json_responses"
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR")
+
+
+def _response_cache(name: str) -> dict:
+    return {
+        "BACKEND": (
+            "django.core.cache.backends.filebased.FileBasedCache"
+            if RESPONSE_CACHE_DIR
+            else "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": (
+            os.path.join(RESPONSE_CACHE_DIR, name)
+            if RESPONSE_CACHE_DIR
+            else name
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+        },
     }
+
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    RESPONSE_CACHE_ALIAS: _response_cache(RESPONSE_CACHE_ALIAS),
+    JSON_CACHE_ALIAS: _response_cache(JSON_CACHE_ALIAS),
 }
 
 
@@ -1,7 +1,7 @@
 import datetime
 from typing import Literal
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, model_validator
 
 City = Literal[
     "Düsseldorf",
@@ -36,24 +36,166 @@ class SelectedOfferType(BaseModel):
     payload: OfferType
 
 
+Bucket = Literal["day", "week", "month"]
+
+# Without a range in the request the comparison shows this many days up to
+# the latest scrape date
+DEFAULT_RANGE_DAYS = 90
+# Longest range per bucket, anything longer is shown per month
+_MAX_DAYS_PER_BUCKET: list[tuple[Bucket, int]] = [("day", 92), ("week", 731)]
+
+
+class DateRange(BaseModel):
+    date_from: datetime.date
+    date_to: datetime.date
+
+    @model_validator(mode="after")
+    def _check_order(self) -> "DateRange":
+        if self.date_from > self.date_to:
+            raise ValueError("date_from is after date_to")
+        return self
+
+    @classmethod
+    def from_isoformat(cls, date_from: str, date_to: str) -> "DateRange":
+        return cls(
+            date_from=datetime.date.fromisoformat(date_from),
+            date_to=datetime.date.fromisoformat(date_to),
+        )
+
+    def bucket(self) -> Bucket:
+        """Keeps the number of points per series below about 100."""
+        n_days = (self.date_to - self.date_from).days + 1
+        for bucket, max_days in _MAX_DAYS_PER_BUCKET:
+            if n_days <= max_days:
+                return bucket
+        return "month"
+
+    def bucket_start(self, date: datetime.date) -> datetime.date:
+        # Like the bucket expressions in city_comparison.sql
+        match self.bucket():
+            case "day":
+                return date
+            case "week":
+                return date - datetime.timedelta(days=date.weekday())
+            case "month":
+                return date.replace(day=1)
+
+
 class ScrapeDates(BaseModel):
     data: list[datetime.date]
 
 
-class SingleRealEstateListingWithLocation(BaseModel):
-    street_address: str | None
-    address_locality: str | None
-    name: str | None
-    url: HttpUrl | None
-    price: float | None
-    square_meters: float | None
-    latitude: float | None
-    longitude: float | None
-    price_rank_normalized: float | None
+class CatalogEntry(BaseModel):
+    date: datetime.date
+    address_locality: str
+    offer_type: str | None
+    n_listings: int
+
+
+class Catalog(BaseModel):
+    data_version: int
+    data: list[CatalogEntry]
+
+    def cities(self) -> list[str]:
+        return sorted({entry.address_locality for entry in self.data})
+
+    def date_range(
+        self, date_from: str | None, date_to: str | None
+    ) -> DateRange:
+        """Fill in the bounds missing in the request."""
+        latest_date = max(
+            (entry.date for entry in self.data), default=datetime.date.today()
+        )
+        date_to_parsed = (
+            datetime.date.fromisoformat(date_to) if date_to else latest_date
+        )
+        date_from_parsed = (
+            datetime.date.fromisoformat(date_from)
+            if date_from
+            else date_to_parsed
+            - datetime.timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        )
+
+        return DateRange(date_from=date_from_parsed, date_to=date_to_parsed)
+
+    def scrape_dates(self, date_range: DateRange | None = None) -> ScrapeDates:
+        """Newest first, as bucket starts if a date range is given."""
+        dates = {entry.date for entry in self.data}
+        if date_range is not None:
+            dates = {
+                date_range.bucket_start(date)
+                for date in dates
+                if date_range.date_from <= date <= date_range.date_to
+            }
+
+        return ScrapeDates(data=sorted(dates, reverse=True))
+
+
+class ListingLocationColumns(BaseModel):
+    """Listings as parallel arrays, the i-th entries belong to one listing."""
+
+    latitude: list[float]
+    longitude: list[float]
+    price: list[float | None]
+    square_meters: list[float | None]
+    price_rank_normalized: list[float | None]
+    name: list[str | None]
+    url: list[HttpUrl | None]
+
+
+class BoundingBox(BaseModel):
+    west: float = Field(ge=-180, le=180)
+    south: float = Field(ge=-90, le=90)
+    east: float = Field(ge=-180, le=180)
+    north: float = Field(ge=-90, le=90)
+
+    @classmethod
+    def from_bbox_string(cls, bbox: str) -> "BoundingBox":
+        """Parse "west,south,east,north", like Leaflet's toBBoxString()."""
+        west, south, east, north = (float(part) for part in bbox.split(","))
+        return cls(west=west, south=south, east=east, north=north)
+
+
+class MapViewport(BaseModel):
+    zoom: int = Field(ge=0, le=19)
+    bbox: BoundingBox
+
+    @classmethod
+    def from_query_params(
+        cls, zoom: str | None, bbox: str | None
+    ) -> "MapViewport":
+        return cls.model_validate(
+            {"zoom": zoom, "bbox": BoundingBox.from_bbox_string(bbox or "")}
+        )
+
+
+class MapCellColumns(BaseModel):
+    """Grid cells as parallel arrays, located at their listings' centroid."""
+
+    latitude: list[float]
+    longitude: list[float]
+    n_listings: list[int]
+    price_median: list[float | None]
+    price_per_square_meter_mean: list[float | None]
+    price_rank_normalized: list[float | None]
+
+
+class MapView(BaseModel):
+    """Either the grid cells or, zoomed in far enough, the listings."""
+
+    zoom: int
+    cells: MapCellColumns | None
+    listings: ListingLocationColumns | None
+
+
+ExportFormat = Literal["csv", "ndjson"]
 
 
-class RealEstateListingsWithLocation(BaseModel):
-    data: list[SingleRealEstateListingWithLocation]
+class ExportFilter(BaseModel):
+    city: City | None = None
+    offer_type: OfferType | None = None
+    date_from: datetime.date = datetime.date.min
+    date_to: datetime.date = datetime.date.max
 
 
 class CityInfo(BaseModel):
@@ -24,4 +24,6 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("about", views.about, name="about"),
     path("map", views.map, name="map"),
+    path("api/map/view", views.map_view, name="map_view"),
+    path("api/export", views.export_listings, name="export_listings"),
 ]
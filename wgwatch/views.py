@@ -1,16 +1,30 @@
-from typing import get_args
+import asyncio
+from typing import Any, get_args
+from urllib.parse import urlencode
 
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.http import require_http_methods
+from pydantic import ValidationError
 
+from .cache import (
+    accepts_gzip,
+    cache_json_by_data_version,
+    cache_response_by_data_version,
+)
 from .dataloader import (
-    load_city_comparison_data,
-    load_listings_with_locations,
-    load_scrape_dates,
+    aload_catalog,
+    aload_city_comparison_data,
+    aload_map_view,
 )
-from .models import RealEstateListing
+from .export import EXPORT_CONTENT_TYPES, aiter_export
 from .types import (
     CITY_CENTER_LOCATIONS,
+    DateRange,
+    ExportFilter,
+    MapViewport,
     OfferType,
     SelectedCities,
     SelectedCity,
@@ -18,27 +32,50 @@ from .types import (
 )
 
 
-@require_http_methods(["GET"])
-def home(request):
-    cities = (
-        RealEstateListing.objects.values_list("address_locality", flat=True)
-        .distinct()
-        .order_by("address_locality")
-    )
+async def _aload_city_comparison_data(
+    selected_cities: SelectedCities, date_range: DateRange
+) -> list[dict[str, Any]] | None:
+    if not selected_cities.payload:
+        return None
+    return await aload_city_comparison_data(selected_cities, date_range)
 
-    scrape_dates = load_scrape_dates()
 
+@require_http_methods(["GET"])
+@cache_response_by_data_version
+async def home(request):
     # Get selected cities from query params
+    # Sorted like in the cache key, so the columns don't depend on the order
     selected_cities_validated = SelectedCities(
-        payload=request.GET.getlist("citiesSelection")
+        payload=sorted(request.GET.getlist("citiesSelection"))
     )
-    city_comparison_data = None
-
-    if selected_cities_validated.payload:
-        city_comparison_data = load_city_comparison_data(
-            selected_cities_validated
+    date_from = request.GET.get("dateFrom")
+    date_to = request.GET.get("dateTo")
+    catalog = None
+    try:
+        if date_from and date_to:
+            date_range = DateRange.from_isoformat(date_from, date_to)
+        else:
+            # The default range ends at the latest scrape date of the catalog
+            catalog = await aload_catalog()
+            date_range = catalog.date_range(date_from, date_to)
+    # Also raised by pydantic
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    if catalog is None:
+        # The range doesn't depend on the catalog, so both load at once
+        catalog, city_comparison_data = await asyncio.gather(
+            aload_catalog(),
+            _aload_city_comparison_data(selected_cities_validated, date_range),
+        )
+    else:
+        city_comparison_data = await _aload_city_comparison_data(
+            selected_cities_validated, date_range
         )
 
+    cities = catalog.cities()
+    scrape_dates = catalog.scrape_dates(date_range)
+
     return render(
         request,
         "index.html",
@@ -51,24 +88,23 @@ def home(request):
             ),
             "city_comparison_data": city_comparison_data,
             "scrape_dates": scrape_dates.data,
+            "date_range": date_range,
+            "bucket": date_range.bucket(),
         },
     )
 
 
 @require_http_methods(["GET"])
-def map(request):
-    cities = (
-        RealEstateListing.objects.values_list("address_locality", flat=True)
-        .distinct()
-        .order_by("address_locality")
-    )
+@cache_response_by_data_version
+async def map(request):
+    cities = (await aload_catalog()).cities()
 
     offer_types = list(get_args(OfferType))
     selected_city = request.GET.get("citySelection")
     selected_offer_type = request.GET.get("offerSelection")
     selected_city_validated = None
     selected_offer_type_validated = None
-    listings_with_locations = None
+    map_view_url = None
     city_center_location = None
 
     if selected_city and selected_offer_type:
@@ -80,10 +116,16 @@ def map(request):
             payload=request.GET.get("offerSelection")
         )
 
-        listings_with_locations = load_listings_with_locations(
-            city=selected_city_validated.payload,
-            offer_type=selected_offer_type_validated.payload,
+        # The page only carries the parameters, the browser fetches and
+        # caches the listings of the visible area separately
+        # Only the validated parameters, the page is cached by them
+        map_view_params = urlencode(
+            {
+                "citySelection": selected_city_validated.payload,
+                "offerSelection": selected_offer_type_validated.payload,
+            }
         )
+        map_view_url = f"{reverse('map_view')}?{map_view_params}"
 
         city_center_location = CITY_CENTER_LOCATIONS[
             selected_city_validated.payload
@@ -105,11 +147,7 @@ def map(request):
                 if selected_offer_type_validated
                 else None
             ),
-            "listings_with_locations": (
-                listings_with_locations.model_dump(mode="json")
-                if listings_with_locations
-                else None
-            ),
+            "map_view_url": map_view_url,
             "city_center_location": (
                 city_center_location.model_dump(mode="json")
                 if city_center_location
@@ -119,6 +157,65 @@ def map(request):
     )
 
 
+@require_http_methods(["GET"])
+@cache_json_by_data_version
+async def map_view(request):
+    try:
+        selected_city_validated = SelectedCity(
+            payload=request.GET.get("citySelection")
+        )
+        selected_offer_type_validated = SelectedOfferType(
+            payload=request.GET.get("offerSelection")
+        )
+        viewport = MapViewport.from_query_params(
+            request.GET.get("zoom"), request.GET.get("bbox")
+        )
+    # Also raised by pydantic
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    return await aload_map_view(
+        city=selected_city_validated.payload,
+        offer_type=selected_offer_type_validated.payload,
+        viewport=viewport,
+    )
+
+
+@require_http_methods(["GET"])
+async def export_listings(request):
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest(f"Unknown format {export_format}")
+    try:
+        export_filter = ExportFilter(
+            city=request.GET.get("citySelection") or None,
+            offer_type=request.GET.get("offerSelection") or None,
+            **{
+                field: request.GET[param]
+                for field, param in [
+                    ("date_from", "dateFrom"),
+                    ("date_to", "dateTo"),
+                ]
+                if request.GET.get(param)
+            },
+        )
+    except ValidationError as e:
+        return HttpResponseBadRequest(str(e))
+
+    compress = accepts_gzip(request)
+    response = StreamingHttpResponse(
+        aiter_export(export_filter, export_format, compress),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    if compress:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    response["Content-Disposition"] = (
+        f'attachment; filename="listings.{export_format}"'
+    )
+    return response
+
+
 @require_http_methods(["GET"])
 def about(request):
     return render(